@@ -0,0 +1,200 @@
+"""Benchmarks for the engine, hint and AI hot paths.
+
+Run from the repository root:
+
+    python -m benchmarks.bench --output bench.json
+
+Positions are the edge-id move lists in benchmarks/positions.json (an
+opening, a midgame and a loony chain endgame on the 6x6 board). Every
+random choice is seeded, so two runs on the same commit time the same work.
+The JSON report is meant to be diffed between commits.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+
+import numpy as np
+
+from core.ai_engine import AIEngine
+from core.batch_sim import BatchSimulator
+from core.game_state import GameState
+from core.hint_engine import HintEngine
+from core.search_engine import SearchEngine
+from core.transposition import TranspositionTable
+
+POSITIONS_FILE = os.path.join(os.path.dirname(__file__), "positions.json")
+
+
+def load_positions(path=POSITIONS_FILE):
+    with open(path) as f:
+        data = json.load(f)
+
+    positions = {}
+    for name, moves in data["positions"].items():
+        state = GameState(data["number_of_dots"])
+        for edge in moves:
+            state.apply_edge(edge)
+        positions[name] = state
+    return positions
+
+
+def measure(fn, repeat, warmup=3):
+    """Calls fn repeatedly; returns ops/sec and latency percentiles in microseconds."""
+    for _ in range(warmup):
+        fn()
+
+    samples = np.empty(repeat)
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples[i] = time.perf_counter() - start
+
+    us = samples * 1e6
+    return {
+        "runs": repeat,
+        "ops_per_sec": repeat / samples.sum(),
+        "p50_us": float(np.percentile(us, 50)),
+        "p99_us": float(np.percentile(us, 99)),
+    }
+
+
+# =====================================================
+# Benchmarks
+# =====================================================
+def bench_apply_undo(state, repeat):
+    """One apply_edge/undo_move pair, i.e. the per-move bookkeeping cost."""
+    board = state.copy()
+    edges = board.legal_edges()
+    i = 0
+
+    def step():
+        nonlocal i
+        edge = edges[i % len(edges)]
+        i += 1
+        board.apply_edge(edge)
+        board.undo_move()
+
+    return measure(step, repeat)
+
+
+def bench_hint(state, repeat):
+    # no cache, or every run after the first would be a lookup
+    hints = HintEngine(state.copy(), cache_size=0)
+    return measure(hints.get_best_move, repeat)
+
+
+def bench_ai(state, difficulty, repeat, time_budget, seed):
+    board = state.copy()
+    ai = AIEngine(board, time_budget=time_budget, seed=seed)
+    result = measure(lambda: ai.get_ai_move(difficulty), repeat, warmup=1)
+
+    if difficulty == "hard":
+        # a fresh table per run so repeated runs do not just hit the table
+        engine = SearchEngine(board, time_budget=time_budget, table=TranspositionTable())
+        start = time.perf_counter()
+        engine.best_edge()
+        elapsed = time.perf_counter() - start
+        result["search_nodes"] = engine.nodes
+        result["search_depth"] = engine.depth_reached
+        result["nodes_per_sec"] = engine.nodes / elapsed if elapsed else 0.0
+
+    return result
+
+
+def bench_selfplay(policy, games, seed):
+    """Full games of a policy against itself, start to finish."""
+    moves = 0
+    start = time.perf_counter()
+
+    for i in range(games):
+        state = GameState()
+        ai = AIEngine(state, seed=seed + i)
+        while not state.is_gameover():
+            state.apply_move(ai.get_ai_move(policy))
+            moves += 1
+
+    elapsed = time.perf_counter() - start
+    return {
+        "games": games,
+        "games_per_sec": games / elapsed,
+        "moves_per_sec": moves / elapsed,
+    }
+
+
+def bench_batch_selfplay(policy, games, seed):
+    """The same self-play, all games at once on core.batch_sim arrays."""
+    sim = BatchSimulator(games=games, seed=seed)
+
+    start = time.perf_counter()
+    sim.run(policy)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "games": games,
+        "games_per_sec": games / elapsed,
+        "moves_per_sec": games * sim.move_count / elapsed,
+    }
+
+
+def run(repeat=200, search_repeat=5, games=200, time_budget=0.1, seed=0):
+    positions = load_positions()
+    results = {}
+
+    for name, state in positions.items():
+        results[f"apply_undo/{name}"] = bench_apply_undo(state, repeat * 10)
+        results[f"hint/{name}"] = bench_hint(state, repeat)
+        for difficulty in ("easy", "medium"):
+            results[f"ai_{difficulty}/{name}"] = bench_ai(state, difficulty, repeat,
+                                                         time_budget, seed)
+        for difficulty in ("hard", "mcts"):
+            results[f"ai_{difficulty}/{name}"] = bench_ai(state, difficulty, search_repeat,
+                                                         time_budget, seed)
+
+    for policy in ("easy", "medium"):
+        results[f"selfplay_{policy}"] = bench_selfplay(policy, games, seed)
+        results[f"batch_selfplay_{policy}"] = bench_batch_selfplay(policy, 50 * games, seed)
+
+    return {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "settings": {"repeat": repeat, "search_repeat": search_repeat, "games": games,
+                     "time_budget": time_budget, "seed": seed},
+        "results": results,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the engine, hint and AI hot paths.")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--search-repeat", type=int, default=5,
+                        help="runs for the time-bounded hard/mcts moves")
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--time-budget", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    report = run(args.repeat, args.search_repeat, args.games, args.time_budget, args.seed)
+    text = json.dumps(report, indent=2)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
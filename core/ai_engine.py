@@ -1,69 +1,160 @@
+import threading
+import time
 import numpy as np
+from core.mcts_engine import MCTSEngine
+from core.opening_book import book_for
+from core.parallel_search import ParallelSearchEngine
+from core.search_engine import SearchEngine
+from core.tablebase import tablebase_for
 
 class AIEngine:
-    def __init__(self, engine):
-        self.engine = engine
-
-
+    def __init__(self, state, time_budget=0.2, table=None, workers=1, seed=None,
+                 profiler=None):
+        self.state = state
+        self.cancel_event = threading.Event()
+        self.rng = np.random.RandomState(seed)
+
+        self.workers = workers
+        self.time_budget = time_budget
+        self.table = table
+        # with several workers the search is built by hard_search() on the
+        # first hard move, so other difficulties never start a process pool
+        self.search = None
+        if workers <= 1:
+            self.search = SearchEngine(state, time_budget=time_budget, table=table,
+                                       cancel_event=self.cancel_event)
+        # with a time budget the budget alone bounds the search
+        self.mcts = MCTSEngine(state, playouts=None if time_budget else 2000,
+                               time_budget=time_budget, seed=seed,
+                               cancel_event=self.cancel_event)
+        self.book = book_for(state.number_of_dots)
+        self.tablebase = tablebase_for(state.number_of_dots)
+
+        # a core.profiler.MoveProfiler, or None to skip instrumentation
+        self.profiler = profiler
+
+    def cancel(self):
+        """Ask a move computation running on another thread to stop early."""
+        self.cancel_event.set()
+
+    def clear_cancel(self):
+        self.cancel_event.clear()
 
     def easy_move(self):
-        moves = []
-
-        for r in range(self.engine.row_status.shape[0]):
-            for c in range(self.engine.row_status.shape[1]):
-                if self.engine.row_status[r][c] == 0:
-                    moves.append(("row", (r, c)))
-
-        for r in range(self.engine.col_status.shape[0]):
-            for c in range(self.engine.col_status.shape[1]):
-                if self.engine.col_status[r][c] == 0:
-                    moves.append(("col", (r, c)))
+        edges = self.state.legal_edges()
 
-        if not moves:
+        if not edges:
             return None
 
-        return moves[np.random.randint(0, len(moves))]
+        return self.state.geometry.edge_move(edges[self.rng.randint(0, len(edges))])
 
     def medium_move(self):
-        for br in range(5):
-            for bc in range(5):
-
-                box_edges = [
-                    ("row", (br, bc)),
-                    ("row", (br, bc+1)),
-                    ("col", (br, bc)),
-                    ("col", (br+1, bc))
-                ]
-
-                filled_edges = 0
-                empty_edge = None
-
-                for t, (r, c) in box_edges:
-                    if t == "row":
-                        if self.engine.row_status[r][c] == 1:
-                            filled_edges += 1
-                        else:
-                            empty_edge = ("row", (r, c))
-
-                    else:
-                        if self.engine.col_status[r][c] == 1:
-                            filled_edges += 1
-                        else:
-                            empty_edge = ("col", (r, c))
-
-                if filled_edges == 3 and empty_edge is not None:
-                    return empty_edge
+        capturable = self.state.capturable
+        if capturable:
+            edge = (capturable & -capturable).bit_length() - 1
+            return self.state.geometry.edge_move(edge)
 
         return self.easy_move()
 
+    def precomputed_move(self):
+        """The endgame tablebase or opening book move, or None."""
+        for table in (self.tablebase, self.book):
+            if table is not None:
+                move = table.best_move(self.state)
+                if move is not None:
+                    return move
+        return None
+
+    def hard_search(self):
+        """The engine hard moves use, starting the parallel one if needed."""
+        if self.search is None:
+            self.search = ParallelSearchEngine(self.state, workers=self.workers,
+                                               time_budget=self.time_budget, table=self.table,
+                                               cancel_event=self.cancel_event)
+        return self.search
+
     def hard_move(self):
-        return self.engine.hints.get_best_move()
+        return self.hard_search().get_best_move()
+
+    def shutdown(self):
+        """Stops the parallel search's worker processes, if they were started.
+        A later hard move starts them again."""
+        if isinstance(self.search, ParallelSearchEngine):
+            self.search.shutdown()
+            self.search = None
+
+    def mcts_move(self):
+        return self.mcts.get_best_move()
 
     def get_ai_move(self, difficulty):
+        if self.profiler is not None:
+            return self._profiled_move(difficulty)
+        return self._choose_move(difficulty)
+
+    def _choose_move(self, difficulty):
+        if difficulty in ("hard", "mcts"):
+            move = self.precomputed_move()
+            if move is not None:
+                return move
+
         if difficulty == "easy":
             return self.easy_move()
         if difficulty == "medium":
             return self.medium_move()
         if difficulty == "hard":
             return self.hard_move()
+        if difficulty == "mcts":
+            return self.mcts_move()
         return None
+
+    def _profiled_move(self, difficulty):
+        """get_ai_move, recording where the time went in the profiler's open record."""
+        profiler = self.profiler
+        record = profiler.begin(source="ai", difficulty=difficulty)
+        start = time.perf_counter()
+
+        if difficulty in ("hard", "mcts"):
+            move = self.precomputed_move()
+            if move is not None:
+                profiler.add_time("think", time.perf_counter() - start)
+                record["move"] = move
+                record["precomputed"] = True
+                return move
+
+        search = self.hard_search() if difficulty == "hard" else self.search
+        sequential = isinstance(search, SearchEngine)
+        if sequential:
+            search.timings = {}
+            probes, hits = search.table.probes, search.table.hits
+
+        try:
+            move = self._choose_move(difficulty)
+        finally:
+            elapsed = time.perf_counter() - start
+            timings = search.timings if sequential else None
+            if sequential:
+                search.timings = None
+
+        profiler.add_time("think", elapsed)
+        record["move"] = move
+
+        if difficulty == "hard":
+            for phase, seconds in (timings or {}).items():
+                profiler.add_time(phase, seconds)
+
+            if sequential:
+                probes = search.table.probes - probes
+                hits = search.table.hits - hits
+            else:
+                probes, hits = search.tt_probes, search.tt_hits
+
+            record["nodes"] = search.nodes
+            record["depth"] = search.depth_reached
+            record["nodes_per_sec"] = search.nodes / elapsed if elapsed else 0.0
+            record["tt_probes"] = probes
+            record["tt_hits"] = hits
+            record["tt_hit_rate"] = hits / probes if probes else 0.0
+        elif difficulty == "mcts":
+            record["playouts"] = self.mcts.playouts_done
+
+        return move
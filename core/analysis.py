@@ -0,0 +1,193 @@
+from collections import OrderedDict
+from core.endgame import solve, solve_edges
+from core.game_state import GameState
+from core.hint_engine import HintEngine
+from core.search_engine import SearchEngine
+from core.transposition import TranspositionTable
+
+
+class MoveEvaluation:
+    """One legal move of an analysed position.
+
+    ``value`` is the net number of boxes the player to move ends up with
+    after playing it, as in SearchEngine; ``heuristic`` is the HintEngine
+    score. ``pv`` is the expected continuation starting with this move,
+    as edge ids, or None when it was not asked for.
+    """
+
+    __slots__ = ("edge", "move", "value", "heuristic", "pv")
+
+    def __init__(self, edge, move, value, heuristic, pv=None):
+        self.edge = edge
+        self.move = move
+        self.value = value
+        self.heuristic = heuristic
+        self.pv = pv
+
+    def __repr__(self):
+        return f"MoveEvaluation({self.move}, value={self.value}, heuristic={self.heuristic})"
+
+
+class PositionAnalysis:
+    """Every legal move of a position, best first.
+
+    ``depth`` is the search depth the values are exact to; ``solved`` means
+    the endgame solver valued the position, so the values are final.
+    """
+
+    def __init__(self, moves, depth, solved):
+        self.moves = moves
+        self.depth = depth
+        self.solved = solved
+
+    @property
+    def best(self):
+        return self.moves[0] if self.moves else None
+
+    def value_of(self, edge):
+        for evaluation in self.moves:
+            if evaluation.edge == edge:
+                return evaluation.value
+        return None
+
+
+class Analyzer:
+    """Values every legal move of a position, for hints, heatmaps and tooling.
+
+    Results are cached by the position's symmetry-canonical key, so mirror
+    images and positions revisited by undo, or met again in another game
+    record, are analysed only once.
+    """
+
+    def __init__(self, table=None, time_budget=0.2, max_depth=None, cache_size=4096):
+        self.table = table if table is not None else TranspositionTable()
+        self.time_budget = time_budget
+        self.max_depth = max_depth
+
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+
+    def clear(self):
+        self.cache.clear()
+
+    # =====================================================
+    # PUBLIC
+    # =====================================================
+    def analyse(self, state, pv=False):
+        if not state.legal_edges():
+            return PositionAnalysis([], 0, True)
+
+        zobrist = state.zobrist
+        key, sym = state.position_key()
+
+        cached = self.cache.get(key)
+        if cached is not None and (cached[3] or not pv):
+            self.cache.move_to_end(key)
+            depth, solved, rows, has_pv = cached
+        else:
+            depth, solved, values = self._values(state)
+            hints = self._heuristics(state)
+
+            rows = []
+            for edge, value in values.items():
+                line = self._principal_variation(state, edge, depth, solved) if pv else None
+                rows.append((zobrist.to_canonical(edge, sym), value, hints[edge],
+                             line and [zobrist.to_canonical(e, sym) for e in line]))
+
+            self.cache[key] = (depth, solved, rows, pv)
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+        edge_move = state.geometry.edge_move
+        moves = []
+        for canonical_edge, value, heuristic, line in rows:
+            edge = zobrist.from_canonical(canonical_edge, sym)
+            if pv and line is not None:
+                line = [zobrist.from_canonical(e, sym) for e in line]
+            else:
+                line = None
+            moves.append(MoveEvaluation(edge, edge_move(edge), value, heuristic, line))
+
+        moves.sort(key=lambda m: (m.value, m.heuristic), reverse=True)
+        return PositionAnalysis(moves, depth, solved)
+
+    def analyse_record(self, record, pv=False):
+        """Analysis of the position before each move of a GameRecord."""
+        state = GameState(record.number_of_dots)
+        analyses = []
+        for edge in record.moves:
+            analyses.append(self.analyse(state, pv))
+            state.apply_edge(edge)
+        return analyses
+
+    # =====================================================
+    # Values: exact from the endgame solver when it applies,
+    # otherwise from a full-window search of every root move
+    # =====================================================
+    def _values(self, state):
+        root_edges = state.legal_edges()
+
+        if solve(state) is not None:
+            values = self._solved_values(state, root_edges)
+            if values is not None:
+                return len(root_edges), True, values
+
+        engine = SearchEngine(state, time_budget=self.time_budget,
+                              max_depth=self.max_depth, table=self.table)
+        iterations = engine.analyse_root(root_edges)
+        if iterations:
+            depth, values = iterations[-1]
+            return depth, False, values
+
+        # not even depth 1 finished: fall back to the heuristic alone
+        return 0, False, {edge: 0 for edge in root_edges}
+
+    def _solved_values(self, state, root_edges):
+        board = state.snapshot()
+        values = {}
+
+        for edge in root_edges:
+            captured = len(board.apply_edge(edge))
+            if board.legal_edges():
+                solved = solve_edges(board.edges, board.geometry)
+            else:
+                solved = (0, None)
+            board.undo_move()
+
+            if solved is None:
+                return None
+            values[edge] = captured + solved[0] if captured else -solved[0]
+
+        return values
+
+    def _heuristics(self, state):
+        edges, scores = HintEngine(state).evaluate_all()
+        return dict(zip(edges.tolist(), scores.tolist()))
+
+    # =====================================================
+    # Principal variation: follow the solver, or the table's
+    # best edges, from the position after the move
+    # =====================================================
+    def _principal_variation(self, state, edge, depth, solved):
+        board = state.snapshot()
+        line = [edge]
+        board.apply_edge(edge)
+
+        while len(line) < depth and board.legal_edges():
+            next_edge = None
+            if solved:
+                result = solve_edges(board.edges, board.geometry)
+                next_edge = result[1] if result is not None else None
+            else:
+                key, sym = board.position_key()
+                entry = self.table.probe(key)
+                if entry is not None and entry[3] is not None:
+                    next_edge = board.zobrist.from_canonical(entry[3], sym)
+
+            if next_edge is None or (board.edges >> next_edge) & 1:
+                break
+
+            line.append(next_edge)
+            board.apply_edge(next_edge)
+
+        return line
@@ -0,0 +1,107 @@
+import numpy as np
+from core.bitboard import geometry_for
+from core.game_record import GameRecord
+
+BATCH_POLICIES = ("easy", "medium")
+
+
+class BatchSimulator:
+    """Plays many games at once on stacked NumPy arrays.
+
+    ``drawn`` is a (games, edges) bool array and ``sides`` a (games, boxes)
+    array of side counts; every step draws one edge in every game with a
+    handful of array operations. Every game lasts exactly one move per
+    edge, so all games finish together after ``num_edges`` steps.
+
+    Policies match AIEngine: "easy" draws a random free edge, "medium"
+    completes a box whenever it can and otherwise plays randomly.
+    """
+
+    def __init__(self, number_of_dots=6, games=4096, seed=None):
+        self.geometry = geometry_for(number_of_dots)
+        self.number_of_dots = number_of_dots
+        self.games = games
+        self.rng = np.random.default_rng(seed)
+
+        # boxes either side of each edge; border edges point their missing
+        # side at the extra column of ``sides``
+        self.first = self.geometry.edge_box_first
+        self.second = self.geometry.edge_box_second
+
+        self.reset()
+
+    def reset(self):
+        g = self.games
+        geometry = self.geometry
+
+        self.drawn = np.zeros((g, geometry.num_edges), dtype=bool)
+        self.sides = np.zeros((g, geometry.num_boxes + 1), dtype=np.int8)
+        self.scores = np.zeros((g, 2), dtype=np.int16)
+        self.player1_turn = np.ones(g, dtype=bool)
+
+        self.moves = np.zeros((g, geometry.num_edges), dtype=np.int16)
+        self.move_count = 0
+
+    def is_gameover(self):
+        return self.move_count == self.geometry.num_edges
+
+    # =====================================================
+    # Move choice: the highest-priority free edge per game,
+    # random among equals
+    # =====================================================
+    def choose(self, policy):
+        # free edges score 1 + a random tiebreak (+1 more for a capture
+        # under "medium"); multiplying by ~drawn zeroes the drawn ones,
+        # which is much cheaper than a masked assignment
+        priority = self.rng.random(self.drawn.shape, dtype=np.float32)
+        priority += 1
+
+        if policy == "medium":
+            completes = ((self.sides[:, self.first] == 3) |
+                         (self.sides[:, self.second] == 3))
+            priority += completes
+        elif policy != "easy":
+            raise ValueError(f"unknown batch policy {policy!r}")
+
+        priority *= ~self.drawn
+        return priority.argmax(axis=1)
+
+    def apply(self, edges):
+        """Draws edges[i] in game i, claiming any boxes it completes."""
+        rows = np.arange(self.games)
+        first = self.first[edges]
+        second = self.second[edges]
+
+        self.drawn[rows, edges] = True
+        self.sides[rows, first] += 1
+        self.sides[rows, second] += 1
+        self.sides[:, -1] = 0
+
+        completed = ((self.sides[rows, first] == 4).astype(np.int16) +
+                     (self.sides[rows, second] == 4))
+
+        self.scores[:, 0] += np.where(self.player1_turn, completed, 0)
+        self.scores[:, 1] += np.where(self.player1_turn, 0, completed)
+        self.player1_turn ^= completed == 0
+
+        self.moves[:, self.move_count] = edges
+        self.move_count += 1
+
+    def step(self, policy_p1, policy_p2=None):
+        if policy_p2 is None or policy_p2 == policy_p1:
+            edges = self.choose(policy_p1)
+        else:
+            edges = np.where(self.player1_turn, self.choose(policy_p1), self.choose(policy_p2))
+        self.apply(edges)
+
+    def run(self, policy_p1="easy", policy_p2=None):
+        """Plays every game to the end; returns the (games, 2) final scores."""
+        while not self.is_gameover():
+            self.step(policy_p1, policy_p2)
+        return self.scores
+
+    def to_records(self, player1="", player2=""):
+        """The finished games as core.game_record.GameRecord objects."""
+        count = self.move_count
+        for moves, (p1, p2) in zip(self.moves[:, :count].tolist(), self.scores.tolist()):
+            yield GameRecord(self.number_of_dots, moves, player1, player2, p1, p2)
@@ -0,0 +1,99 @@
+from functools import lru_cache
+import numpy as np
+
+
+# =====================================================
+# Edge numbering
+#
+# Row edges come first, then col edges, both in (r, c) order, so iterating
+# edge ids gives the same move order the engines always used:
+#   row (r, c) -> r * N + c                    r < N-1, c < N
+#   col (r, c) -> (N-1) * N + r * (N-1) + c    r < N,   c < N-1
+# Box (r, c) has index r * (N-1) + c.
+#
+# BoardGeometry precomputes every edge/box relation once per board size;
+# engines read these tables instead of redoing the index arithmetic.
+# =====================================================
+class BoardGeometry:
+    def __init__(self, number_of_dots):
+        n = number_of_dots
+
+        self.number_of_dots = n
+        self.boxes_per_side = n - 1
+        self.num_row_edges = (n - 1) * n
+        self.num_edges = 2 * (n - 1) * n
+        self.num_boxes = (n - 1) * (n - 1)
+
+        self.all_edges = (1 << self.num_edges) - 1
+        self.all_boxes = (1 << self.num_boxes) - 1
+
+        # ("row"/"col", (r, c)) of every edge id, and (r, c) of every box
+        self.edge_moves = [self._edge_move(edge) for edge in range(self.num_edges)]
+        self.box_positions = [divmod(box, n - 1) for box in range(self.num_boxes)]
+
+        # the four edges around each box: top, bottom, left, right
+        self.box_edges = []
+        for r, c in self.box_positions:
+            self.box_edges.append((
+                self.edge_index("row", (r, c)),
+                self.edge_index("row", (r, c + 1)),
+                self.edge_index("col", (r, c)),
+                self.edge_index("col", (r + 1, c)),
+            ))
+
+        # the same as bitmasks
+        self.box_masks = [sum(1 << edge for edge in edges) for edges in self.box_edges]
+
+        # the one or two boxes each edge borders
+        edge_boxes = [[] for _ in range(self.num_edges)]
+        for box, edges in enumerate(self.box_edges):
+            for edge in edges:
+                edge_boxes[edge].append(box)
+        self.edge_boxes = [tuple(boxes) for boxes in edge_boxes]
+
+        # every edge sharing a box with each edge, itself included: the
+        # edges whose surroundings change when it is drawn
+        self.edge_neighbours = [
+            tuple(sorted({e for box in self.edge_boxes[edge] for e in self.box_edges[box]}))
+            for edge in range(self.num_edges)
+        ]
+
+        # array forms for vectorised code: the boxes either side of each
+        # edge, with border edges pointing their missing side at an extra
+        # slot num_boxes past the last box
+        self.edge_box_first = np.array([boxes[0] for boxes in self.edge_boxes])
+        self.edge_box_second = np.array([boxes[1] if len(boxes) > 1 else self.num_boxes
+                                         for boxes in self.edge_boxes])
+        self.box_edge_array = np.array(self.box_edges)
+
+    def edge_index(self, t, pos):
+        r, c = pos
+        if t == "row":
+            return r * self.number_of_dots + c
+        return self.num_row_edges + r * (self.number_of_dots - 1) + c
+
+    def edge_move(self, edge):
+        return self.edge_moves[edge]
+
+    def _edge_move(self, edge):
+        if edge < self.num_row_edges:
+            return "row", divmod(edge, self.number_of_dots)
+        return "col", divmod(edge - self.num_row_edges, self.number_of_dots - 1)
+
+    def box_index(self, r, c):
+        return r * self.boxes_per_side + c
+
+    def box_pos(self, box):
+        return self.box_positions[box]
+
+
+@lru_cache(maxsize=None)
+def geometry_for(number_of_dots):
+    return BoardGeometry(number_of_dots)
+
+
+def iter_bits(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
@@ -0,0 +1,217 @@
+from functools import lru_cache
+from core.bitboard import iter_bits
+
+GROUND = -1
+
+
+# =====================================================
+# Exact solver for the loony endgame
+#
+# Once every box nobody owns has at least 2 sides drawn there are no safe
+# moves left and the board falls apart into independent chains and loops
+# (strings of boxes with 2 sides), plus possibly pieces that are already
+# opened and can be captured. Values are the net number of boxes the player
+# to move wins from here, as in SearchEngine.
+# =====================================================
+def solve(state):
+    """Returns (value, edge) of the optimal move, or None when the position
+    still has safe moves and is outside the solver's reach."""
+    return solve_edges(state.edges, state.geometry)
+
+
+def solve_edges(edges, geometry):
+    strings = _strings(edges, geometry)
+    if not strings:
+        return None
+
+    chains, loops, pieces = [], [], []
+    for boxes in _components(strings):
+        path = _walk(strings, boxes)
+        capturable = sum(1 for b in boxes if len(strings[b]) == 1)
+        grounded = any(other == GROUND for b in boxes for _, other in strings[b])
+
+        if capturable:
+            pieces.append((capturable, path))
+        elif grounded:
+            chains.append(path)
+        else:
+            loops.append(path)
+
+    chain_lengths = tuple(sorted(len(p) for p in chains))
+    loop_lengths = tuple(sorted(len(p) for p in loops))
+    rest = control_value(chain_lengths, loop_lengths)[0]
+
+    if pieces:
+        return _capture_move(strings, pieces, rest)
+    return _opening_move(strings, chains, loops)
+
+
+@lru_cache(maxsize=None)
+def control_value(chains, loops):
+    """Value for the player who must open one of the given chains/loops.
+
+    Returns (value, kind, length) of the best component to open. The
+    opponent either takes everything and moves next, or takes all but the
+    last 2 boxes of a chain (4 of a loop) and keeps control. Chains of 1 or
+    2 boxes can always be opened so that declining is impossible.
+    """
+    if not chains and not loops:
+        return 0, None, 0
+
+    best = None
+    for kind, lengths in (("chain", chains), ("loop", loops)):
+        for length in sorted(set(lengths)):
+            i = lengths.index(length)
+            rest_lengths = lengths[:i] + lengths[i + 1:]
+            if kind == "chain":
+                rest = control_value(rest_lengths, loops)[0]
+            else:
+                rest = control_value(chains, rest_lengths)[0]
+
+            opponent = length + rest
+            if kind == "chain" and length >= 3:
+                opponent = max(opponent, length - 4 - rest)
+            elif kind == "loop":
+                opponent = max(opponent, length - 8 - rest)
+
+            if best is None or -opponent > best[0]:
+                best = (-opponent, kind, length)
+
+    return best
+
+
+def _capture_move(strings, pieces, rest):
+    total = sum(len(path) for _, path in pieces)
+    best = (total + rest, None)
+
+    for i, (capturable, path) in enumerate(pieces):
+        if capturable == 1 and len(path) >= 2:
+            value = total - 4 - rest
+        elif capturable == 2 and len(path) >= 4:
+            value = total - 8 - rest
+        else:
+            continue
+        if value > best[0]:
+            best = (value, i)
+
+    value, declined = best
+    if declined is None:
+        return value, _link(strings, pieces[0][1][0])
+
+    # take every other box first, then hand the last 2 (or 4) back
+    for i, (_, path) in enumerate(pieces):
+        if i != declined:
+            return value, _link(strings, path[0])
+
+    capturable, path = pieces[declined]
+    if capturable == 1:
+        if len(path) > 2:
+            return value, _link(strings, path[0])
+        return value, _link(strings, path[1], GROUND)
+
+    if len(path) > 4:
+        return value, _link(strings, path[0])
+    return value, _link(strings, path[1], path[2])
+
+
+def _opening_move(strings, chains, loops):
+    chain_lengths = tuple(sorted(len(p) for p in chains))
+    loop_lengths = tuple(sorted(len(p) for p in loops))
+    value, kind, length = control_value(chain_lengths, loop_lengths)
+
+    if kind == "loop":
+        path = next(p for p in loops if len(p) == length)
+        return value, _link(strings, path[0])
+
+    path = next(p for p in chains if len(p) == length)
+    if length == 2:
+        # open in the middle so the opponent cannot decline
+        return value, _link(strings, path[0], path[1])
+    return value, _link(strings, path[0], GROUND)
+
+
+# =====================================================
+# Strings-and-coins view of the board
+# =====================================================
+def _strings(edges, geometry):
+    """Maps each open box to its (edge, neighbour) links, neighbour being
+    another box or GROUND. Returns None if some box has fewer than 2 sides."""
+    strings = {}
+
+    for box, mask in enumerate(geometry.box_masks):
+        free = mask & ~edges
+        if not free:
+            continue
+        if free.bit_count() > 2:
+            return None
+
+        links = []
+        for edge in iter_bits(free):
+            other = GROUND
+            for neighbour in geometry.edge_boxes[edge]:
+                if neighbour != box:
+                    other = neighbour
+            links.append((edge, other))
+        strings[box] = links
+
+    return strings
+
+
+def _components(strings):
+    seen = set()
+    components = []
+
+    for start in strings:
+        if start in seen:
+            continue
+
+        seen.add(start)
+        stack = [start]
+        boxes = []
+        while stack:
+            box = stack.pop()
+            boxes.append(box)
+            for _, other in strings[box]:
+                if other != GROUND and other not in seen:
+                    seen.add(other)
+                    stack.append(other)
+        components.append(boxes)
+
+    return components
+
+
+def _walk(strings, boxes):
+    """Orders a component's boxes from one end to the other, starting at a
+    capturable box if there is one. Loops start anywhere."""
+    start = boxes[0]
+    for box in boxes:
+        links = strings[box]
+        if len(links) == 1:
+            start = box
+            break
+        if any(other == GROUND for _, other in links):
+            start = box
+
+    path = [start]
+    previous = None
+    current = start
+    while True:
+        step = None
+        for _, other in strings[current]:
+            if other != GROUND and other != previous and other != start:
+                step = other
+                break
+        if step is None:
+            break
+        previous, current = current, step
+        path.append(current)
+
+    return path
+
+
+def _link(strings, box, other=None):
+    """Edge of ``box`` leading to ``other`` (any free edge when None)."""
+    for edge, neighbour in strings[box]:
+        if other is None or neighbour == other:
+            return edge
+    return strings[box][0][0]
@@ -1,6 +1,11 @@
+import time
 from tkinter import *
+from core.analysis import Analyzer
+from core.bitboard import iter_bits
+from core.game_state import GameState
 from core.hint_engine import HintEngine
 from core.ai_engine import AIEngine
+from core.transposition import TranspositionTable
 import numpy as np
 
 size_of_board = 600
@@ -12,141 +17,208 @@ player1_color_light = '#67B0CF'
 player2_color = '#EE4035'
 player2_color_light = '#EE7E77'
 
-dot_width = 0.25 * size_of_board / number_of_dots
-edge_width = 0.1 * size_of_board / number_of_dots
-distance_between_dots = size_of_board / number_of_dots
+# heatmap runs green -> yellow -> red as a move loses up to heatmap_worst boxes
+heatmap_worst = 4
+
+
+def heat_color(loss):
+    red = int(255 * min(1.0, 2 * loss))
+    green = int(200 * min(1.0, 2 * (1 - loss)))
+    return f'#{red:02X}{green:02X}00'
+
 
 class GameEngine:
-    def __init__(self, canvas):
+    def __init__(self, canvas, number_of_dots=number_of_dots, ai_workers=1, profiler=None):
         self.canvas = canvas
 
-        self.hints = HintEngine(self)
-        self.ai = AIEngine(self)
+        self.number_of_dots = number_of_dots
+        self.distance_between_dots = size_of_board / number_of_dots
+        self.dot_width = 0.25 * self.distance_between_dots
+        self.edge_width = 0.1 * self.distance_between_dots
 
-        self.row_status = np.zeros((number_of_dots - 1, number_of_dots))
-        self.col_status = np.zeros((number_of_dots, number_of_dots - 1))
-        self.box_owner = np.zeros((number_of_dots - 1, number_of_dots - 1))
+        self.state = GameState(number_of_dots)
+        self.table = TranspositionTable()
+        self.hints = HintEngine(self.state, self.table)
+        self.ai = AIEngine(self.state, table=self.table, workers=ai_workers)
+        self.analyzer = Analyzer(self.table, time_budget=0.3)
+        self.set_profiler(profiler)
 
-        self.player1_turn = True
         self.turntext_handle = None
 
-        self.move_history = []
+        # canvas item of every drawn edge and shaded box, by edge/box id
+        self.edge_items = {}
+        self.box_items = {}
+
+        # history records undone since the last new move, most recent last
+        self.redo_stack = []
 
         self.refresh_board()
         self.display_turn_text()
 
+    def set_profiler(self, profiler):
+        """Turns per-move instrumentation on (a MoveProfiler) or off (None)."""
+        self.profiler = profiler
+        self.ai.profiler = profiler
+
+    @property
+    def row_status(self):
+        return self.state.row_status
+
+    @property
+    def col_status(self):
+        return self.state.col_status
+
+    @property
+    def box_owner(self):
+        return self.state.box_owner
+
+    @property
+    def player1_turn(self):
+        return self.state.player1_turn
+
+    @property
+    def move_history(self):
+        return self.state.move_history
+
     def reset_game_state(self):
         self.canvas.delete("edge")
         self.canvas.delete("box")
         self.canvas.delete("turn")
         self.canvas.delete("hint")
+        self.canvas.delete("heatmap")
+        self.edge_items.clear()
+        self.box_items.clear()
+        self.redo_stack.clear()
+        self.hints.clear_cache()
 
-        self.row_status.fill(0)
-        self.col_status.fill(0)
-        self.box_owner.fill(0)
-        self.move_history.clear()
-
-        self.player1_turn = True
+        self.state.reset()
 
         self.refresh_board()
         self.display_turn_text()
 
     def convert_grid_to_logical_position(self, grid_pos):
         gp = np.array(grid_pos)
-        pos = (gp - distance_between_dots / 4) // (distance_between_dots / 2)
+        pos = (gp - self.distance_between_dots / 4) // (self.distance_between_dots / 2)
+
+        n = self.number_of_dots
 
         if pos[1] % 2 == 0 and (pos[0] - 1) % 2 == 0:
             r = int((pos[0] - 1) // 2)
             c = int(pos[1] // 2)
-            return [r, c], "row"
+            if 0 <= r < n - 1 and 0 <= c < n:
+                return [r, c], "row"
 
         if pos[0] % 2 == 0 and (pos[1] - 1) % 2 == 0:
             r = int(pos[0] // 2)
             c = int((pos[1] - 1) // 2)
-            return [r, c], "col"
+            if 0 <= r < n and 0 <= c < n - 1:
+                return [r, c], "col"
 
         return [], False
 
     def is_grid_occupied(self, pos, t):
-        r, c = pos
-        return (self.row_status[r][c] == 1) if t == "row" else (self.col_status[r][c] == 1)
+        return self.state.is_occupied(t, pos)
 
     def refresh_board(self):
         self.canvas.delete("grid")
         self.canvas.delete("dot")
 
-        for i in range(number_of_dots):
-            x = i * distance_between_dots + distance_between_dots / 2
+        for i in range(self.number_of_dots):
+            x = i * self.distance_between_dots + self.distance_between_dots / 2
 
-            self.canvas.create_line(x, distance_between_dots / 2,
-                                    x, size_of_board - distance_between_dots / 2,
+            self.canvas.create_line(x, self.distance_between_dots / 2,
+                                    x, size_of_board - self.distance_between_dots / 2,
                                     fill="gray", dash=(2, 2), tags="grid")
 
-            self.canvas.create_line(distance_between_dots / 2, x,
-                                    size_of_board - distance_between_dots / 2, x,
+            self.canvas.create_line(self.distance_between_dots / 2, x,
+                                    size_of_board - self.distance_between_dots / 2, x,
                                     fill="gray", dash=(2, 2), tags="grid")
 
-        for i in range(number_of_dots):
-            for j in range(number_of_dots):
-                cx = i * distance_between_dots + distance_between_dots / 2
-                cy = j * distance_between_dots + distance_between_dots / 2
-                self.canvas.create_oval(cx - dot_width / 2, cy - dot_width / 2,
-                                        cx + dot_width / 2, cy + dot_width / 2,
+        for i in range(self.number_of_dots):
+            for j in range(self.number_of_dots):
+                cx = i * self.distance_between_dots + self.distance_between_dots / 2
+                cy = j * self.distance_between_dots + self.distance_between_dots / 2
+                self.canvas.create_oval(cx - self.dot_width / 2, cy - self.dot_width / 2,
+                                        cx + self.dot_width / 2, cy + self.dot_width / 2,
                                         fill=dot_color, outline=dot_color, tags="dot")
 
-    def make_edge(self, t, pos):
+    def edge_coords(self, t, pos):
         r, c = pos
 
         if t == "row":
-            sx = distance_between_dots/2 + r*distance_between_dots
-            sy = distance_between_dots/2 + c*distance_between_dots
-            ex = sx + distance_between_dots
+            sx = self.distance_between_dots/2 + r*self.distance_between_dots
+            sy = self.distance_between_dots/2 + c*self.distance_between_dots
+            ex = sx + self.distance_between_dots
             ey = sy
         else:
-            sx = distance_between_dots/2 + r*distance_between_dots
-            sy = distance_between_dots/2 + c*distance_between_dots
+            sx = self.distance_between_dots/2 + r*self.distance_between_dots
+            sy = self.distance_between_dots/2 + c*self.distance_between_dots
             ex = sx
-            ey = sy + distance_between_dots
+            ey = sy + self.distance_between_dots
+
+        return sx, sy, ex, ey
+
+    def make_edge(self, t, pos):
+        sx, sy, ex, ey = self.edge_coords(t, pos)
 
         color = player1_color if self.player1_turn else player2_color
 
-        self.canvas.create_line(sx, sy, ex, ey, fill=color,
-                                width=edge_width, tags="edge")
+        edge = self.state.geometry.edge_index(t, pos)
+        self.edge_items[edge] = self.canvas.create_line(sx, sy, ex, ey, fill=color,
+                                                        width=self.edge_width, tags="edge")
         self.canvas.tag_lower("edge", "dot")
 
     def shade_box(self, r, c, owner):
         color = player1_color_light if owner == 1 else player2_color_light
 
-        sx = distance_between_dots/2 + r*distance_between_dots + edge_width/2
-        sy = distance_between_dots/2 + c*distance_between_dots + edge_width/2
-        ex = sx + distance_between_dots - edge_width
-        ey = sy + distance_between_dots - edge_width
+        sx = self.distance_between_dots/2 + r*self.distance_between_dots + self.edge_width/2
+        sy = self.distance_between_dots/2 + c*self.distance_between_dots + self.edge_width/2
+        ex = sx + self.distance_between_dots - self.edge_width
+        ey = sy + self.distance_between_dots - self.edge_width
 
-        self.canvas.create_rectangle(sx, sy, ex, ey, fill=color,
-                                     outline="", tags="box")
+        box = self.state.geometry.box_index(r, c)
+        self.box_items[box] = self.canvas.create_rectangle(sx, sy, ex, ey, fill=color,
+                                                           outline="", tags="box")
         self.canvas.tag_lower("box", "dot")
 
-    def update_boxes(self):
-        completed = False
+    def play_move(self, t, pos):
+        self.canvas.delete("heatmap")
+        if self.profiler is not None:
+            return self._profiled_play_move(t, pos)
 
-        for r in range(number_of_dots - 1):
-            for c in range(number_of_dots - 1):
+        owner = 1 if self.player1_turn else 2
 
-                if self.box_owner[r][c] != 0:
-                    continue
+        self.make_edge(t, pos)
+
+        boxes_completed = self.state.apply_move((t, pos))
+        for r, c in boxes_completed:
+            self.shade_box(r, c, owner)
+
+        return boxes_completed
+
+    def _profiled_play_move(self, t, pos):
+        """play_move, timing the drawing and closing the move's profiler record."""
+        profiler = self.profiler
+        if profiler.current is None:
+            profiler.begin(source="human", move=(t, tuple(pos)))
+
+        owner = 1 if self.player1_turn else 2
+
+        start = time.perf_counter()
+        self.make_edge(t, pos)
+        drawn = time.perf_counter() - start
+
+        boxes_completed = self.state.apply_move((t, pos))
 
-                top = self.row_status[r][c] == 1
-                bottom = self.row_status[r][c+1] == 1
-                left = self.col_status[r][c] == 1
-                right = self.col_status[r+1][c] == 1
+        start = time.perf_counter()
+        for r, c in boxes_completed:
+            self.shade_box(r, c, owner)
+        drawn += time.perf_counter() - start
 
-                if top and bottom and left and right:
-                    owner = 1 if self.player1_turn else 2
-                    self.box_owner[r][c] = owner
-                    self.shade_box(r, c, owner)
-                    completed = True
+        profiler.add_time("render", drawn)
+        profiler.end()
 
-        return completed
+        return boxes_completed
 
     def display_turn_text(self):
         if self.turntext_handle:
@@ -161,118 +233,91 @@ class GameEngine:
         )
 
     def is_gameover(self):
-        return np.all(self.box_owner != 0)
+        return self.state.is_gameover()
 
     def undo_move(self):
-        if not self.move_history:
+        record = self.state.undo_move()
+        if record is None:
             return False
-        
-        move_data = self.move_history[-1]
-        t, pos, was_player1_turn, boxes_completed = move_data
-        
-        if boxes_completed:
+
+        # only the undone edge and its boxes change on the canvas
+        self.canvas.delete("heatmap")
+        edge, was_player1_turn, captured = record
+        self.canvas.delete(self.edge_items.pop(edge))
+        for box in iter_bits(captured):
+            self.canvas.delete(self.box_items.pop(box))
+
+        self.redo_stack.append(record)
+        self.display_turn_text()
+
+        return True
+
+    def redo_move(self):
+        if not self.redo_stack:
             return False
-        
-        self.move_history.pop()
-        r, c = pos
-        
-        if t == "row":
-            self.row_status[r][c] = 0
-        else:
-            self.col_status[r][c] = 0
-        
-        self.player1_turn = was_player1_turn
-        
-        self.canvas.delete("edge")
-        self.canvas.delete("box")
-        self.refresh_board()
-        self.redraw_all_edges()
-        self.redraw_all_boxes()
+
+        edge, was_player1_turn, captured = self.redo_stack.pop()
+        t, pos = self.state.geometry.edge_move(edge)
+        self.play_move(t, pos)
+
         self.display_turn_text()
-        
+
         return True
-    
-    def redraw_all_edges(self):
-        edge_owner = {}
-        for t, pos, was_player1, _ in self.move_history:
-            edge_owner[(t, tuple(pos))] = 1 if was_player1 else 2
-        
-        for r in range(number_of_dots - 1):
-            for c in range(number_of_dots):
-                if self.row_status[r][c] == 1:
-                    owner = edge_owner.get(("row", (r, c)), 1)
-                    color = player1_color if owner == 1 else player2_color
-                    sx = distance_between_dots/2 + r*distance_between_dots
-                    sy = distance_between_dots/2 + c*distance_between_dots
-                    ex = sx + distance_between_dots
-                    ey = sy
-                    self.canvas.create_line(sx, sy, ex, ey, fill=color,
-                                            width=edge_width, tags="edge")
-        
-        for r in range(number_of_dots):
-            for c in range(number_of_dots - 1):
-                if self.col_status[r][c] == 1:
-                    owner = edge_owner.get(("col", (r, c)), 1)
-                    color = player1_color if owner == 1 else player2_color
-                    sx = distance_between_dots/2 + r*distance_between_dots
-                    sy = distance_between_dots/2 + c*distance_between_dots
-                    ex = sx
-                    ey = sy + distance_between_dots
-                    self.canvas.create_line(sx, sy, ex, ey, fill=color,
-                                            width=edge_width, tags="edge")
-        
-        self.canvas.tag_lower("edge", "dot")
-    
-    def redraw_all_boxes(self):
-        for r in range(number_of_dots - 1):
-            for c in range(number_of_dots - 1):
-                if self.box_owner[r][c] != 0:
-                    owner = int(self.box_owner[r][c])
-                    self.shade_box(r, c, owner)
 
     def get_hint(self):
         return self.hints.get_best_move()
 
     def highlight_edge(self, t, pos):
         self.canvas.delete("hint")
-        r, c = pos
-
-        if t == "row":
-            sx = distance_between_dots/2 + r*distance_between_dots
-            sy = distance_between_dots/2 + c*distance_between_dots
-            ex = sx + distance_between_dots
-            ey = sy
-        else:
-            sx = distance_between_dots/2 + r*distance_between_dots
-            sy = distance_between_dots/2 + c*distance_between_dots
-            ex = sx
-            ey = sy + distance_between_dots
+        sx, sy, ex, ey = self.edge_coords(t, pos)
 
         self.canvas.create_line(sx, sy, ex, ey,
-                                fill="yellow", width=edge_width+2,
+                                fill="yellow", width=self.edge_width+2,
                                 dash=(4,2), tags="hint")
 
         self.canvas.tag_raise("hint")
         self.canvas.tag_lower("hint", "dot")
 
-    def ai_move(self, difficulty):
-        move = self.ai.get_ai_move(difficulty)
-        if move is None:
-            return None
+    def analyse(self, pv=False):
+        """Analyses a snapshot of the position, so it may run on a worker thread."""
+        return self.analyzer.analyse(self.state.snapshot(), pv)
 
-        t, (r, c) = move
+    def show_heatmap(self, analysis=None):
+        """Colours every free edge from green (best) to red (4+ boxes worse).
 
-        if t == "row":
-            self.row_status[r][c] = 1
-        else:
-            self.col_status[r][c] = 1
+        Pass the result of analyse() when it was computed off the Tk thread;
+        otherwise the position is analysed here, taking the analyzer's time
+        budget.
+        """
+        self.canvas.delete("heatmap")
+
+        if analysis is None:
+            analysis = self.analyse()
+        if analysis.best is None:
+            return
+
+        best = analysis.best.value
+        for evaluation in analysis.moves:
+            t, pos = evaluation.move
+            sx, sy, ex, ey = self.edge_coords(t, pos)
+            loss = min(max(best - evaluation.value, 0), heatmap_worst) / heatmap_worst
 
-        self.make_edge(t, (r, c))
+            self.canvas.create_line(sx, sy, ex, ey, fill=heat_color(loss),
+                                    width=self.edge_width / 2, tags="heatmap")
 
-        scored = self.update_boxes()
+        self.canvas.tag_lower("heatmap", "dot")
+
+    def ai_move(self, difficulty):
+        return self.apply_ai_move(self.ai.get_ai_move(difficulty))
+
+    def apply_ai_move(self, move):
+        """Plays a move the AI has already computed, e.g. on a worker thread."""
+        if move is None:
+            return None
 
-        if not scored:
-            self.player1_turn = not self.player1_turn
+        t, pos = move
+        self.redo_stack.clear()
+        self.play_move(t, pos)
 
         self.display_turn_text()
 
@@ -288,35 +333,17 @@ class GameEngine:
         if self.is_grid_occupied(pos, t):
             return None
 
-        r, c = pos
-        
-        was_player1_turn = self.player1_turn
-
-        if t == "row":
-            self.row_status[r][c] = 1
-        else:
-            self.col_status[r][c] = 1
-
-        self.make_edge(t, pos)
-
-        scored = self.update_boxes()
-        
-        boxes_completed = []
-        for br in range(number_of_dots - 1):
-            for bc in range(number_of_dots - 1):
-                if self.box_owner[br][bc] == (1 if was_player1_turn else 2):
-                    boxes_completed.append((br, bc))
+        if self.profiler is not None:
+            # drop any record left open by a cancelled AI move
+            self.profiler.begin(source="human", move=(t, (pos[0], pos[1])))
 
-        if not scored:
-            self.player1_turn = not self.player1_turn
-        
-        self.move_history.append((t, (r, c), was_player1_turn, boxes_completed))
+        self.redo_stack.clear()
+        self.play_move(t, (pos[0], pos[1]))
 
         self.display_turn_text()
 
         if self.is_gameover():
-            p1 = int(np.count_nonzero(self.box_owner == 1))
-            p2 = int(np.count_nonzero(self.box_owner == 2))
+            p1, p2 = self.state.score()
 
             winner = "Winner: Player 1" if p1 > p2 else (
                      "Winner: Player 2" if p2 > p1 else "It's a tie")
@@ -0,0 +1,228 @@
+import mmap
+from core.game_state import GameState
+
+# A record file is MAGIC followed by games back to back. Each game is
+#
+#   varint number_of_dots
+#   varint len, utf-8 player 1 name
+#   varint len, utf-8 player 2 name
+#   varint player 1 boxes, varint player 2 boxes
+#   varint move count, then one varint edge id per move
+#
+# Varints are little-endian base-128, so on boards up to 8x8 dots every
+# edge id fits in a single byte and a 6x6 game is about 75 bytes.
+MAGIC = b"DBGR\x01"
+
+
+def write_varint(buffer, value):
+    while value >= 0x80:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def read_varint(data, offset):
+    """Returns (value, offset just past it)."""
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+class GameRecord:
+    """One finished (or abandoned) game: board size, players, score and edge ids in order."""
+
+    __slots__ = ("number_of_dots", "player1", "player2", "p1_score", "p2_score", "moves")
+
+    def __init__(self, number_of_dots, moves, player1="", player2="", p1_score=0, p2_score=0):
+        self.number_of_dots = number_of_dots
+        self.moves = moves
+        self.player1 = player1
+        self.player2 = player2
+        self.p1_score = p1_score
+        self.p2_score = p2_score
+
+    @classmethod
+    def from_state(cls, state, player1="", player2=""):
+        p1, p2 = state.score()
+        moves = [edge for edge, _, _ in state.move_history]
+        return cls(state.number_of_dots, moves, player1, player2, p1, p2)
+
+    def replay(self):
+        """A GameState with every move applied, history included."""
+        state = GameState(self.number_of_dots)
+        for edge in self.moves:
+            state.apply_edge(edge)
+        return state
+
+    def encode(self, buffer=None):
+        buffer = bytearray() if buffer is None else buffer
+
+        write_varint(buffer, self.number_of_dots)
+        for name in (self.player1, self.player2):
+            raw = name.encode()
+            write_varint(buffer, len(raw))
+            buffer += raw
+        write_varint(buffer, self.p1_score)
+        write_varint(buffer, self.p2_score)
+
+        write_varint(buffer, len(self.moves))
+        if self.number_of_dots <= 8:
+            buffer += bytes(self.moves)
+        else:
+            for edge in self.moves:
+                write_varint(buffer, edge)
+
+        return buffer
+
+    @classmethod
+    def decode(cls, data, offset=0):
+        """Returns (record, offset just past it)."""
+        number_of_dots, offset = read_varint(data, offset)
+
+        names = []
+        for _ in range(2):
+            length, offset = read_varint(data, offset)
+            names.append(bytes(data[offset:offset + length]).decode())
+            offset += length
+
+        p1_score, offset = read_varint(data, offset)
+        p2_score, offset = read_varint(data, offset)
+
+        count, offset = read_varint(data, offset)
+        if number_of_dots <= 8:
+            moves = list(data[offset:offset + count])
+            offset += count
+        else:
+            moves = []
+            for _ in range(count):
+                edge, offset = read_varint(data, offset)
+                moves.append(edge)
+
+        return cls(number_of_dots, moves, names[0], names[1], p1_score, p2_score), offset
+
+    def __eq__(self, other):
+        return isinstance(other, GameRecord) and all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        return (f"GameRecord({self.number_of_dots}, {len(self.moves)} moves, "
+                f"{self.player1!r} {self.p1_score} - {self.p2_score} {self.player2!r})")
+
+
+class GameRecordWriter:
+    """Appends games to a record file, buffering writes.
+
+        with GameRecordWriter("selfplay.dbgr") as out:
+            out.write(GameRecord.from_state(state, "hard", "mcts"))
+    """
+
+    def __init__(self, path, buffer_size=1 << 20):
+        self.file = open(path, "wb")
+        self.file.write(MAGIC)
+        self.buffer = bytearray()
+        self.buffer_size = buffer_size
+        self.games_written = 0
+
+    def write(self, record):
+        record.encode(self.buffer)
+        self.games_written += 1
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def write_encoded(self, data):
+        """Appends a game already encoded with GameRecord.encode."""
+        self.buffer += data
+        self.games_written += 1
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        self.file.write(self.buffer)
+        self.buffer.clear()
+
+    def close(self):
+        if self.file is not None:
+            self.flush()
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class GameRecordReader:
+    """Memory-maps a record file and reads games from it.
+
+    Iterating streams the file front to back. Indexing scans it once to
+    find where every game starts, then decodes just the requested game.
+    """
+
+    def __init__(self, path):
+        self.data = None
+        self.file = open(path, "rb")
+        try:
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            pass  # an empty file cannot be mapped
+        if self.data is None or self.data[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a game record file")
+        self._offsets = None
+
+    def __iter__(self):
+        data = self.data
+        offset = len(MAGIC)
+        end = len(data)
+        while offset < end:
+            record, offset = GameRecord.decode(data, offset)
+            yield record
+
+    def offsets(self):
+        if self._offsets is None:
+            offsets = []
+            data = self.data
+            offset = len(MAGIC)
+            while offset < len(data):
+                offsets.append(offset)
+                offset = GameRecord.decode(data, offset)[1]
+            self._offsets = offsets
+        return self._offsets
+
+    def __len__(self):
+        return len(self.offsets())
+
+    def __getitem__(self, index):
+        return GameRecord.decode(self.data, self.offsets()[index])[0]
+
+    def close(self):
+        if self.data is not None:
+            self.data.close()
+            self.data = None
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def save_games(path, records):
+    with GameRecordWriter(path) as out:
+        for record in records:
+            out.write(record)
+        return out.games_written
+
+
+def load_games(path):
+    with GameRecordReader(path) as reader:
+        return list(reader)
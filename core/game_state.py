@@ -0,0 +1,267 @@
+import numpy as np
+from core.bitboard import geometry_for, iter_bits
+from core.transposition import zobrist_for
+
+
+class GameState:
+    """Board state of a dots and boxes game, with no rendering attached.
+
+    Drawn edges are bits of ``edges`` and each player's boxes are bits of
+    ``p1_boxes``/``p2_boxes`` (see core.bitboard for the numbering). Moves
+    use the same ("row"/"col", (r, c)) form as the hint and AI engines.
+
+    Alongside the edges the state keeps, move by move:
+      sides        side count of every box
+      three_sided  boxes with exactly 3 sides, as a bitmask
+      capturable   free edges that complete a box
+      unsafe       free edges that give some box its 3rd side
+    """
+
+    def __init__(self, number_of_dots=6):
+        self.number_of_dots = number_of_dots
+        self.geometry = geometry_for(number_of_dots)
+        self.zobrist = zobrist_for(number_of_dots)
+
+        self.edges = 0
+        self.p1_boxes = 0
+        self.p2_boxes = 0
+        # Zobrist keys of the edges under each board symmetry, kept up to date
+        # move by move so position lookups never rehash the board
+        self.hashes = self.zobrist.hashes(0)
+        self._count_sides()
+
+        self.player1_turn = True
+        self.move_history = []
+
+    def reset(self):
+        self.edges = 0
+        self.p1_boxes = 0
+        self.p2_boxes = 0
+        self.hashes = self.zobrist.hashes(0)
+        self._count_sides()
+        self.move_history.clear()
+
+        self.player1_turn = True
+
+    def restore(self, edges, p1_boxes, p2_boxes, player1_turn):
+        """Sets up a position directly, without any move history."""
+        self.edges = edges
+        self.p1_boxes = p1_boxes
+        self.p2_boxes = p2_boxes
+        self.hashes = self.zobrist.hashes(edges)
+        self._count_sides()
+        self.player1_turn = player1_turn
+        self.move_history = []
+
+    def copy(self):
+        other = self.snapshot()
+        other.move_history = list(self.move_history)
+        return other
+
+    def snapshot(self):
+        """A detached copy of the position without the move history.
+
+        Everything but the side counts is an immutable int, so this costs
+        about as much as copying one short list. Hints and searches read or
+        play on a snapshot while the UI goes on using the live state.
+        """
+        other = GameState.__new__(GameState)
+        other.number_of_dots = self.number_of_dots
+        other.geometry = self.geometry
+        other.zobrist = self.zobrist
+        other.edges = self.edges
+        other.p1_boxes = self.p1_boxes
+        other.p2_boxes = self.p2_boxes
+        other.hashes = self.hashes
+        other.sides = list(self.sides)
+        other.three_sided = self.three_sided
+        other.capturable = self.capturable
+        other.unsafe = self.unsafe
+        other.player1_turn = self.player1_turn
+        other.move_history = []
+        return other
+
+    def position_key(self):
+        """(canonical key, symmetry index) shared by all mirror images."""
+        return self.zobrist.canonical(self.hashes)
+
+    # =====================================================
+    # Array views, for rendering and display code
+    # =====================================================
+    @property
+    def row_status(self):
+        n = self.number_of_dots
+        edge_moves = self.geometry.edge_moves
+        status = np.zeros((n - 1, n))
+        for edge in iter_bits(self.edges & ((1 << self.geometry.num_row_edges) - 1)):
+            status[edge_moves[edge][1]] = 1
+        return status
+
+    @property
+    def col_status(self):
+        n = self.number_of_dots
+        edge_moves = self.geometry.edge_moves
+        status = np.zeros((n, n - 1))
+        for edge in iter_bits(self.edges & ~((1 << self.geometry.num_row_edges) - 1)):
+            status[edge_moves[edge][1]] = 1
+        return status
+
+    @property
+    def box_owner(self):
+        n = self.number_of_dots
+        box_positions = self.geometry.box_positions
+        owner = np.zeros((n - 1, n - 1))
+        for box in iter_bits(self.p1_boxes):
+            owner[box_positions[box]] = 1
+        for box in iter_bits(self.p2_boxes):
+            owner[box_positions[box]] = 2
+        return owner
+
+    @property
+    def captured(self):
+        return self.p1_boxes | self.p2_boxes
+
+    def is_occupied(self, t, pos):
+        return (self.edges >> self.geometry.edge_index(t, pos)) & 1 == 1
+
+    def legal_edges(self):
+        return list(iter_bits(self.geometry.all_edges & ~self.edges))
+
+    def legal_moves(self):
+        edge_move = self.geometry.edge_move
+        return [edge_move(e) for e in iter_bits(self.geometry.all_edges & ~self.edges)]
+
+    def apply_move(self, move):
+        """Draw an edge for the player to move.
+
+        Returns the list of boxes the move completed. The turn passes to the
+        other player only when that list is empty.
+        """
+        t, pos = move
+        return self.apply_edge(self.geometry.edge_index(t, pos))
+
+    def apply_edge(self, edge):
+        was_player1_turn = self.player1_turn
+
+        self.edges |= 1 << edge
+        self.hashes = self.zobrist.update(self.hashes, edge)
+
+        # only the one or two boxes bordering the edge can change
+        sides = self.sides
+        captured = 0
+        for box in self.geometry.edge_boxes[edge]:
+            count = sides[box] + 1
+            sides[box] = count
+            if count == 3:
+                self.three_sided |= 1 << box
+            elif count == 4:
+                self.three_sided &= ~(1 << box)
+                captured |= 1 << box
+        self._update_edge_sets(edge)
+
+        if captured:
+            if was_player1_turn:
+                self.p1_boxes |= captured
+            else:
+                self.p2_boxes |= captured
+        else:
+            self.player1_turn = not self.player1_turn
+
+        self.move_history.append((edge, was_player1_turn, captured))
+
+        return self._box_positions(captured)
+
+    def undo_move(self):
+        """Take back the last move, including any boxes it completed.
+
+        History entries are (edge, was_player1_turn, captured box mask), so
+        this only clears bits. Returns the undone entry, or None if there
+        is nothing to undo.
+        """
+        if not self.move_history:
+            return None
+
+        record = self.move_history.pop()
+        edge, was_player1_turn, captured = record
+
+        self.edges &= ~(1 << edge)
+        self.hashes = self.zobrist.update(self.hashes, edge)
+
+        sides = self.sides
+        for box in self.geometry.edge_boxes[edge]:
+            count = sides[box] - 1
+            sides[box] = count
+            if count == 3:
+                self.three_sided |= 1 << box
+            elif count == 2:
+                self.three_sided &= ~(1 << box)
+        self._update_edge_sets(edge)
+
+        self.p1_boxes &= ~captured
+        self.p2_boxes &= ~captured
+
+        self.player1_turn = was_player1_turn
+
+        return record
+
+    # =====================================================
+    # Side counts and the capturable/unsafe edge sets
+    # =====================================================
+    @property
+    def safe_edges(self):
+        """Free edges that give no box its 3rd side, as a bitmask."""
+        return self.geometry.all_edges & ~self.edges & ~self.unsafe
+
+    def _update_edge_sets(self, edge):
+        """Re-derives capturable/unsafe for the edges around a changed edge."""
+        edges = self.edges
+        sides = self.sides
+        edge_boxes = self.geometry.edge_boxes
+        capturable = self.capturable
+        unsafe = self.unsafe
+
+        for neighbour in self.geometry.edge_neighbours[edge]:
+            bit = 1 << neighbour
+            capturable &= ~bit
+            unsafe &= ~bit
+            if not edges & bit:
+                for box in edge_boxes[neighbour]:
+                    count = sides[box]
+                    if count == 3:
+                        capturable |= bit
+                    elif count == 2:
+                        unsafe |= bit
+
+        self.capturable = capturable
+        self.unsafe = unsafe
+
+    def _count_sides(self):
+        """Rebuilds the side counts and edge sets from scratch."""
+        edges = self.edges
+        geometry = self.geometry
+
+        self.sides = [(edges & mask).bit_count() for mask in geometry.box_masks]
+        self.three_sided = sum(1 << box for box, count in enumerate(self.sides) if count == 3)
+
+        self.capturable = 0
+        self.unsafe = 0
+        for edge in iter_bits(geometry.all_edges & ~edges):
+            counts = [self.sides[box] for box in geometry.edge_boxes[edge]]
+            if 3 in counts:
+                self.capturable |= 1 << edge
+            if 2 in counts:
+                self.unsafe |= 1 << edge
+
+    def _box_positions(self, boxes):
+        if not boxes:
+            return []
+        return [self.geometry.box_pos(box) for box in iter_bits(boxes)]
+
+    def side_count(self, box):
+        return self.sides[box]
+
+    def score(self):
+        return self.p1_boxes.bit_count(), self.p2_boxes.bit_count()
+
+    def is_gameover(self):
+        return self.captured == self.geometry.all_boxes
@@ -1,64 +1,176 @@
+from collections import OrderedDict
 import numpy as np
+from core.endgame import solve
+from core.opening_book import book_for
+from core.tablebase import tablebase_for
+
+TOUCHING_BONUS = np.array([2, 5, 3, 0, 0, 0, 0, 0, 0])
+
 
 class HintEngine:
-    def __init__(self, engine):
-        self.engine = engine
-        self.N = 6
+    """Suggests a move for the position in ``state``.
+
+    Suggestions are cached by the position's Zobrist hash, so asking again
+    for the same position costs one lookup. The hash follows the drawn
+    edges, so undoing a move needs no invalidation; clear_cache() drops
+    everything, e.g. for a new game.
+    """
+
+    def __init__(self, state, table=None, cache_size=1024):
+        self.state = state
+        self.table = table
+        self.book = book_for(state.number_of_dots)
+        self.tablebase = tablebase_for(state.number_of_dots)
+
+        # Zobrist hash -> (edge, exact); LRU order
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def clear_cache(self):
+        self.cache.clear()
+        self.cache_hits = 0
+        self.cache_misses = 0
 
     # =====================================================
     # PUBLIC: returns ("row"/"col", (r,c)) of best move
     # =====================================================
     def get_best_move(self):
-        moves = self._get_all_moves()
-        if not moves:
+        # everything below reads this snapshot, never the live state, so a
+        # hint can be worked out on another thread while the game goes on
+        state = self.state.snapshot()
+        if not state.legal_edges():
             return None
 
-        best_score = -999999
-        best_move = None
+        key = state.hashes[0]
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.cache_hits += 1
+            self.cache.move_to_end(key)
+        else:
+            self.cache_misses += 1
+
+        # exact answers (tables, solver) always win; a cached heuristic
+        # choice still gives way to a search result found since
+        if cached is not None and cached[1]:
+            return state.geometry.edge_move(cached[0])
+
+        if cached is None:
+            edge = self._exact_edge(state)
+            if edge is not None:
+                self._remember(key, edge, True)
+                return state.geometry.edge_move(edge)
+
+        searched = self._table_move(state)
+        if searched is not None:
+            return searched
+
+        if cached is not None:
+            return state.geometry.edge_move(cached[0])
+
+        edges, scores = self.evaluate_all(state)
+        edge = int(edges[np.argmax(scores)])
+        self._remember(key, edge, False)
+        return state.geometry.edge_move(edge)
+
+    def _exact_edge(self, state):
+        """Best edge from the tablebase, the opening book or the endgame solver."""
+        if self.tablebase is not None:
+            found = self.tablebase.lookup(state)
+            if found is not None:
+                return found[1]
+
+        if self.book is not None:
+            edge = self.book.best_edge(state)
+            if edge is not None:
+                return edge
+
+        solved = solve(state)
+        if solved is not None:
+            return solved[1]
+
+        return None
+
+    def _remember(self, key, edge, exact):
+        self.cache[key] = (edge, exact)
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
 
-        for move in moves:
-            score = self._evaluate(move)
+    # =====================================================
+    # Batched evaluation: the _evaluate score of every legal
+    # edge at once, from one array of box side counts
+    # =====================================================
+    def evaluate_all(self, state=None):
+        """Returns (legal edge ids, their _evaluate scores) as arrays, for
+        ``state`` or by default the engine's own."""
+        state = self.state if state is None else state
+        geometry = state.geometry
+        edges = np.array(state.legal_edges(), dtype=np.int64)
 
-            if score > best_score:
-                best_score = score
-                best_move = move
+        # side counts of every box, plus a slot for "no box" whose count
+        # matches nothing; owned boxes have 4 sides and never border a legal edge
+        sides = np.empty(geometry.num_boxes + 1, dtype=np.int64)
+        sides[:-1] = state.sides
+        sides[-1] = -10
 
-        return best_move
+        a = sides[geometry.edge_box_first[edges]]
+        b = sides[geometry.edge_box_second[edges]]
+        has_b = b >= 0
 
-    def _get_all_moves(self):
-        moves = []
+        threes = np.count_nonzero(sides == 3)
+        twos = np.count_nonzero(sides == 2)
 
-        for r in range(self.N - 1):
-            for c in range(self.N):
-                if self.engine.row_status[r][c] == 0:
-                    moves.append(("row", (r, c)))
+        completes = (a == 3) | (b == 3)
+        threes_after = threes - (a == 3) - (b == 3) + (a == 2) + (b == 2)
+        twos_after = twos - (a == 2) - (b == 2) + (a == 1) + (b == 1)
+        touching = (a + 1) + np.where(has_b, b + 1, 0)
 
-        for r in range(self.N):
-            for c in range(self.N - 1):
-                if self.engine.col_status[r][c] == 0:
-                    moves.append(("col", (r, c)))
+        scores = (100 * completes - 50 * (threes_after > 0) + 20 * twos_after +
+                  TOUCHING_BONUS[touching])
 
-        return moves
+        return edges, scores
 
     # =====================================================
-    # Heuristic evaluation function (core)
+    # Reuse a search result for this position (or any of its
+    # rotations/reflections) when the AI has already searched it
     # =====================================================
-    def _evaluate(self, move):
-        t, (r, c) = move
+    def _table_move(self, state):
+        if self.table is None:
+            return None
+
+        key, sym = state.position_key()
+        entry = self.table.probe(key)
+        if entry is None or entry[3] is None:
+            return None
+
+        edge = state.zobrist.from_canonical(entry[3], sym)
+        if (state.edges >> edge) & 1:
+            return None
+        return state.geometry.edge_move(edge)
+
+    # =====================================================
+    # Heuristic evaluation function (core). Works on the edge
+    # bitmask with the move added, never on the state itself
+    # =====================================================
+    def _evaluate(self, move, state=None):
+        state = self.state if state is None else state
+        edge = state.geometry.edge_index(*move)
+        edges = state.edges | (1 << edge)
         score = 0
 
-        self._apply(t, r, c)
+        sides = self._open_box_sides(state, edges)
 
-        if self._would_complete_box():
+        if self._would_complete_box(sides):
             score += 100
 
-        if self._creates_three_sided_box():
+        if self._creates_three_sided_box(sides):
             score -= 50
 
-        chain_gain = self._estimate_chain_gain()
+        chain_gain = self._estimate_chain_gain(sides)
         score += chain_gain * 20
 
-        touching = self._count_touching_sides(move)
+        touching = self._count_touching_sides(state, edges, edge)
         if touching == 0:
             score += 2
         elif touching == 1:
@@ -66,117 +178,36 @@ class HintEngine:
         elif touching == 2:
             score += 3
 
-        self._undo(t, r, c)
-
         return score
 
-    def _apply(self, t, r, c):
-        if t == "row":
-            self.engine.row_status[r][c] = 1
-        else:
-            self.engine.col_status[r][c] = 1
-
-    def _undo(self, t, r, c):
-        if t == "row":
-            self.engine.row_status[r][c] = 0
-        else:
-            self.engine.col_status[r][c] = 0
-
-    def _would_complete_box(self):
-        for r in range(self.N - 1):
-            for c in range(self.N - 1):
-
-                if self.engine.box_owner[r][c] != 0:
-                    continue
+    def _open_box_sides(self, state, edges):
+        """Side counts, under ``edges``, of every box nobody owns yet."""
+        captured = state.captured
 
-                top    = self.engine.row_status[r][c] == 1
-                bottom = self.engine.row_status[r][c + 1] == 1
-                left   = self.engine.col_status[r][c] == 1
-                right  = self.engine.col_status[r + 1][c] == 1
+        return [(edges & mask).bit_count()
+                for box, mask in enumerate(state.geometry.box_masks)
+                if not (captured >> box) & 1]
 
-                if top and bottom and left and right:
-                    return True
-
-        return False
+    def _would_complete_box(self, sides):
+        return 4 in sides
 
     # =====================================================
     # 3-sided trap check
     # =====================================================
-    def _creates_three_sided_box(self):
-        for r in range(self.N - 1):
-            for c in range(self.N - 1):
-
-                if self.engine.box_owner[r][c] != 0:
-                    continue
-
-                sides = (
-                    self.engine.row_status[r][c] +
-                    self.engine.row_status[r][c + 1] +
-                    self.engine.col_status[r][c] +
-                    self.engine.col_status[r + 1][c]
-                )
-
-                if sides == 3:
-                    return True
-
-        return False
+    def _creates_three_sided_box(self, sides):
+        return 3 in sides
 
     # =====================================================
     # Chain estimation: count boxes with 2 sides
     # =====================================================
-    def _estimate_chain_gain(self):
-        chain = 0
-
-        for r in range(self.N - 1):
-            for c in range(self.N - 1):
-
-                if self.engine.box_owner[r][c] != 0:
-                    continue
-
-                sides = (
-                    self.engine.row_status[r][c] +
-                    self.engine.row_status[r][c + 1] +
-                    self.engine.col_status[r][c] +
-                    self.engine.col_status[r + 1][c]
-                )
-
-                if sides == 2:
-                    chain += 1
-
-        return chain
+    def _estimate_chain_gain(self, sides):
+        return sides.count(2)
 
     # =====================================================
     # Count how many sides of nearby boxes touch the move
     # Helps rank "safe" edges
     # =====================================================
-    def _count_touching_sides(self, move):
-        t, (r, c) = move
-
-        def count_box_sides(br, bc):
-            if br < 0 or bc < 0 or br >= self.N-1 or bc >= self.N-1:
-                return 0
-
-            top    = self.engine.row_status[br][bc]
-            bottom = self.engine.row_status[br][bc+1]
-            left   = self.engine.col_status[br][bc]
-            right  = self.engine.col_status[br+1][bc]
-
-            return top + bottom + left + right
-
-        total = 0
-
-        if t == "row":
-            # affects box above and below the row
-            if c - 1 >= 0:
-                total += count_box_sides(r, c - 1)
-            if c < self.N - 1:
-                total += count_box_sides(r, c)
-
-        else:
-            # affects box left and right of a vertical line
-            if r - 1 >= 0:
-                total += count_box_sides(r - 1, c)
-            if r < self.N - 1:
-                total += count_box_sides(r, c)
-
-        return total
+    def _count_touching_sides(self, state, edges, edge):
+        geometry = state.geometry
+        return sum((edges & geometry.box_masks[box]).bit_count()
+                   for box in geometry.edge_boxes[edge])
@@ -0,0 +1,198 @@
+import math
+import random
+import time
+from core.bitboard import iter_bits
+from core.endgame import solve
+
+
+class _Node:
+    __slots__ = ("edge", "parent", "player", "children", "untried", "visits", "wins")
+
+    def __init__(self, edge, parent, player, untried):
+        self.edge = edge
+        self.parent = parent
+        self.player = player          # player (1/2) who drew the edge into this node
+        self.children = []
+        self.untried = untried
+        self.visits = 0
+        self.wins = 0.0
+
+
+class MCTSEngine:
+    """Monte Carlo tree search with UCT selection and random rollouts.
+
+    The search stops after ``playouts`` rollouts or ``time_budget`` seconds,
+    whichever comes first; pass playouts=None to search for the whole
+    budget. With ``greedy_rollouts`` the rollouts take a 3-sided box
+    whenever one exists and otherwise avoid drawing a box's 3rd side while
+    any other edge is left. Rollouts back up the final box margin scaled
+    to 0..1, not just win/loss, so a bigger win is worth more.
+    Loony endgames are played exactly by core.endgame, as in SearchEngine.
+    """
+
+    def __init__(self, state, playouts=2000, time_budget=None,
+                 greedy_rollouts=True, exploration=1.4, seed=None, cancel_event=None):
+        self.state = state
+        self.playouts = playouts
+        self.time_budget = time_budget
+        self.greedy_rollouts = greedy_rollouts
+        self.exploration = exploration
+        self.rng = random.Random(seed)
+        self.cancel_event = cancel_event
+
+        self.playouts_done = 0
+
+    # =====================================================
+    # PUBLIC: returns ("row"/"col", (r,c)) of best move
+    # =====================================================
+    def get_best_move(self):
+        edge = self.best_edge()
+        if edge is None:
+            return None
+        return self.state.geometry.edge_move(edge)
+
+    def best_edge(self):
+        board = self.state.snapshot()
+        root_edges = board.legal_edges()
+        self.playouts_done = 0
+        if not root_edges:
+            return None
+        if len(root_edges) == 1:
+            return root_edges[0]
+
+        solved = solve(board)
+        if solved is not None:
+            return solved[1]
+
+        root = _Node(None, None, None, self._candidates(board))
+        deadline = None
+        if self.time_budget is not None:
+            deadline = time.perf_counter() + self.time_budget
+
+        while self.playouts is None or self.playouts_done < self.playouts:
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+            if self.cancel_event is not None and self.cancel_event.is_set():
+                break
+            self._iterate(board, root)
+            self.playouts_done += 1
+
+        if not root.children:
+            return root_edges[0]
+
+        best = max(root.children, key=lambda child: child.visits)
+        return best.edge
+
+    def _iterate(self, board, root):
+        node = root
+        depth = 0
+
+        # selection
+        while not node.untried and node.children:
+            node = self._select(node)
+            board.apply_edge(node.edge)
+            depth += 1
+
+        # expansion
+        if node.untried:
+            edge = node.untried.pop(self.rng.randrange(len(node.untried)))
+            player = 1 if board.player1_turn else 2
+            board.apply_edge(edge)
+            depth += 1
+            child = _Node(edge, node, player, self._candidates(board))
+            node.children.append(child)
+            node = child
+
+        p1, p2 = self._rollout(board)
+
+        for _ in range(depth):
+            board.undo_move()
+
+        # backpropagation: player 1's margin as 0..1, mirrored for player 2
+        reward = 0.5 + (p1 - p2) / (2 * board.geometry.num_boxes)
+        while node is not None:
+            node.visits += 1
+            if node.player is not None:
+                node.wins += reward if node.player == 1 else 1 - reward
+            node = node.parent
+
+    @staticmethod
+    def _candidates(board):
+        """Edges the tree tries from a position: captures if there are any,
+        else edges that hand over no box, else everything."""
+        mask = board.capturable or board.safe_edges or board.geometry.all_edges & ~board.edges
+        return list(iter_bits(mask))
+
+    def _select(self, node):
+        log_visits = math.log(node.visits)
+        c = self.exploration
+
+        return max(node.children,
+                   key=lambda child: child.wins / child.visits +
+                   c * math.sqrt(log_visits / child.visits))
+
+    # =====================================================
+    # Rollout: plays the game out on plain ints, returns final scores
+    # =====================================================
+    def _rollout(self, board):
+        geometry = board.geometry
+        box_masks = geometry.box_masks
+        edge_boxes = geometry.edge_boxes
+        rng = self.rng
+
+        edges = board.edges
+        p1, p2 = board.score()
+        player1_turn = board.player1_turn
+
+        free = board.legal_edges()
+        sides = list(board.sides)
+        three_sided = set(iter_bits(board.three_sided))
+        # side counts only grow, so once no safe edge is left none comes back
+        safe_left = self.greedy_rollouts
+
+        while free:
+            edge = None
+            if self.greedy_rollouts and three_sided:
+                box = next(iter(three_sided))
+                edge = (box_masks[box] & ~edges).bit_length() - 1
+                free.remove(edge)
+            else:
+                i = rng.randrange(len(free))
+                if safe_left:
+                    i = self._find_safe(free, i, sides, edge_boxes)
+                    if i is None:
+                        safe_left = False
+                        i = rng.randrange(len(free))
+                free[i], free[-1] = free[-1], free[i]
+                edge = free.pop()
+
+            edges |= 1 << edge
+            completed = 0
+            for box in edge_boxes[edge]:
+                sides[box] += 1
+                if sides[box] == 3:
+                    three_sided.add(box)
+                elif sides[box] == 4:
+                    three_sided.discard(box)
+                    completed += 1
+
+            if completed:
+                if player1_turn:
+                    p1 += completed
+                else:
+                    p2 += completed
+            else:
+                player1_turn = not player1_turn
+
+        return p1, p2
+
+    @staticmethod
+    def _find_safe(free, start, sides, edge_boxes):
+        """Index of the first edge from ``start`` on (wrapping round) that
+        gives no box a 3rd side, or None."""
+        n = len(free)
+        for k in range(n):
+            i = (start + k) % n
+            if all(sides[box] < 2 for box in edge_boxes[free[i]]):
+                return i
+        return None
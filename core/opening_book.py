@@ -0,0 +1,148 @@
+"""Opening book: precomputed best moves for the first few plies.
+
+Build one offline with
+
+    python -m core.opening_book --size 6 --plies 3 --time-budget 2 --workers 8
+
+which searches every symmetry-canonical position with fewer than ``plies``
+edges drawn and writes assets/opening_book_<size>.bin. AIEngine and
+HintEngine pick the file up automatically when it exists.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from core.bitboard import geometry_for
+from core.game_state import GameState
+from core.position_table import PositionTable, check_board_size, write_position_table
+from core.transposition import zobrist_for
+
+BOOK_MAGIC = b"DBOB"
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets")
+
+
+def book_path(number_of_dots):
+    return os.path.join(ASSETS_DIR, f"opening_book_{number_of_dots}.bin")
+
+
+@lru_cache(maxsize=None)
+def book_for(number_of_dots):
+    """The shipped book for this board size, mapped once per process, or None."""
+    path = book_path(number_of_dots)
+    if not os.path.exists(path):
+        return None
+    return OpeningBook(path)
+
+
+class OpeningBook(PositionTable):
+    def __init__(self, path):
+        super().__init__(path, BOOK_MAGIC)
+
+    def best_edge(self, state):
+        """The book edge for this position (in its own frame), or None."""
+        key, sym = state.position_key()
+        entry = self.probe(key)
+        if entry is None or entry[0] is None:
+            return None
+
+        edge = state.zobrist.from_canonical(entry[0], sym)
+        if (state.edges >> edge) & 1:
+            return None
+        return edge
+
+    def best_move(self, state):
+        edge = self.best_edge(state)
+        if edge is None:
+            return None
+        return state.geometry.edge_move(edge)
+
+
+# =====================================================
+# Generation
+# =====================================================
+def canonical_positions(number_of_dots, plies):
+    """Edge sets of one representative of every position with fewer than
+    ``plies`` edges drawn, up to symmetry."""
+    geometry = geometry_for(number_of_dots)
+    zobrist = zobrist_for(number_of_dots)
+
+    layer = {zobrist.canonical(zobrist.hashes(0))[0]: 0}
+    positions = list(layer.values())
+
+    for _ in range(plies - 1):
+        next_layer = {}
+        for edges in layer.values():
+            hashes = zobrist.hashes(edges)
+            free = geometry.all_edges & ~edges
+            while free:
+                low = free & -free
+                free ^= low
+                edge = low.bit_length() - 1
+                key = zobrist.canonical(zobrist.update(hashes, edge))[0]
+                if key not in next_layer:
+                    next_layer[key] = edges | low
+        layer = next_layer
+        positions.extend(layer.values())
+
+    return positions
+
+
+def _search_position(number_of_dots, edges, time_budget):
+    # imported here: the search engine itself consults the book via HintEngine
+    from core.search_engine import SearchEngine
+
+    state = GameState(number_of_dots)
+    geometry = state.geometry
+    completed = 0
+    for box, mask in enumerate(geometry.box_masks):
+        if edges & mask == mask:
+            completed |= 1 << box
+    state.restore(edges, completed, 0, True)
+
+    engine = SearchEngine(state, time_budget=time_budget)
+    depth, edge, value = engine.search_root(state.legal_edges())[-1]
+
+    key, sym = state.position_key()
+    return key, state.zobrist.to_canonical(edge, sym), value or 0
+
+
+def build_book(number_of_dots, plies, time_budget, workers=1):
+    """Returns {canonical key: (canonical edge, value)} for the book."""
+    positions = canonical_positions(number_of_dots, plies)
+    jobs = [(number_of_dots, edges, time_budget) for edges in positions]
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_search_position, *zip(*jobs)))
+    else:
+        results = [_search_position(*job) for job in jobs]
+
+    return {key: (edge, value) for key, edge, value in results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build an opening book by offline search.")
+    parser.add_argument("--size", type=int, default=6, help="dots per side")
+    parser.add_argument("--plies", type=int, default=3,
+                        help="cover positions with fewer than this many edges drawn")
+    parser.add_argument("--time-budget", type=float, default=2.0,
+                        help="search seconds per position")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--output", help="defaults to assets/opening_book_<size>.bin")
+    args = parser.parse_args()
+    try:
+        check_board_size(args.size)
+    except ValueError as e:
+        parser.error(str(e))
+
+    start = time.perf_counter()
+    entries = build_book(args.size, args.plies, args.time_budget, args.workers)
+    path = args.output or book_path(args.size)
+    write_position_table(path, BOOK_MAGIC, args.size, entries)
+
+    print(f"{len(entries)} positions in {time.perf_counter() - start:.0f}s -> {path}")
+
+
+if __name__ == "__main__":
+    main()
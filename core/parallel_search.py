@@ -0,0 +1,155 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, wait
+from core.endgame import solve
+from core.game_state import GameState
+from core.hint_engine import HintEngine
+from core.search_engine import SearchEngine
+from core.transposition import EXACT, TranspositionTable
+
+# each worker process keeps its own table between moves
+_worker_table = None
+# set by the parent to stop every worker's search early
+_worker_cancel = None
+
+
+def _init_worker(cancel_event):
+    global _worker_cancel
+    _worker_cancel = cancel_event
+
+
+def _search_split(number_of_dots, edges, p1_boxes, p2_boxes, player1_turn,
+                  root_edges, time_budget):
+    global _worker_table
+    if _worker_table is None:
+        _worker_table = TranspositionTable()
+
+    state = GameState(number_of_dots)
+    state.restore(edges, p1_boxes, p2_boxes, player1_turn)
+
+    probes, hits = _worker_table.probes, _worker_table.hits
+    engine = SearchEngine(state, time_budget=time_budget, table=_worker_table,
+                          cancel_event=_worker_cancel)
+    iterations = engine.search_root(root_edges)
+
+    return (iterations, engine.nodes,
+            _worker_table.probes - probes, _worker_table.hits - hits)
+
+
+class ParallelSearchEngine:
+    """Root-split SearchEngine across a process pool.
+
+    The root moves are dealt out to the workers in heuristic order, so every
+    worker gets a share of the promising ones. Each worker deepens its own
+    share under the same time budget. The merged answer is the best move at
+    the deepest iteration that every worker finished; it is also stored in
+    ``table``, where HintEngine finds it as it would a SearchEngine result.
+
+    Setting ``cancel_event`` stops the workers within a few milliseconds.
+    Workers are "spawn"ed processes, so the pool never forks a process that
+    is running other threads (such as a Tk UI with its AI thread). They are
+    started by the first search and run until shutdown().
+    """
+
+    def __init__(self, state, workers=None, time_budget=0.2, table=None, cancel_event=None):
+        self.state = state
+        self.workers = workers or os.cpu_count() or 1
+        self.time_budget = time_budget
+        self.table = table
+        self.cancel_event = cancel_event
+
+        self.depth_reached = 0
+        self.nodes = 0
+        self.tt_probes = 0
+        self.tt_hits = 0
+
+        context = multiprocessing.get_context("spawn")
+        self._worker_cancel = context.Event()
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                         initializer=_init_worker,
+                                         initargs=(self._worker_cancel,))
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._worker_cancel.set()
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    # =====================================================
+    # PUBLIC: returns ("row"/"col", (r,c)) of best move
+    # =====================================================
+    def get_best_move(self):
+        edge = self.best_edge()
+        if edge is None:
+            return None
+        return self.state.geometry.edge_move(edge)
+
+    def best_edge(self):
+        state = self.state.snapshot()
+        root_edges = state.legal_edges()
+        self.depth_reached = 0
+        self.nodes = self.tt_probes = self.tt_hits = 0
+        if not root_edges:
+            return None
+        if len(root_edges) == 1:
+            return root_edges[0]
+
+        solved = solve(state)
+        if solved is not None:
+            return solved[1]
+
+        legal, scores = HintEngine(state).evaluate_all()
+        score_of = dict(zip(legal.tolist(), scores.tolist()))
+        root_edges.sort(key=score_of.__getitem__, reverse=True)
+
+        splits = [root_edges[i::self.workers] for i in range(self.workers)]
+        splits = [split for split in splits if split]
+
+        self._worker_cancel.clear()
+        futures = [
+            self._pool.submit(_search_split, state.number_of_dots, state.edges,
+                              state.p1_boxes, state.p2_boxes, state.player1_turn,
+                              split, self.time_budget)
+            for split in splits
+        ]
+
+        # poll so a cancel reaches the workers; they then return what they have
+        pending = futures
+        while pending:
+            if self._cancelled():
+                self._worker_cancel.set()
+            pending = wait(pending, timeout=0.005).not_done
+        results = [future.result() for future in futures]
+
+        self.nodes = sum(result[1] for result in results)
+        self.tt_probes = sum(result[2] for result in results)
+        self.tt_hits = sum(result[3] for result in results)
+
+        best_edge, value = self._merge([result[0] for result in results])
+        if self.table is not None and value is not None:
+            key, sym = state.position_key()
+            self.table.store(key, self.depth_reached, value, EXACT,
+                             state.zobrist.to_canonical(best_edge, sym))
+
+        return best_edge
+
+    def _cancelled(self):
+        return self.cancel_event is not None and self.cancel_event.is_set()
+
+    def _merge(self, results):
+        """(best edge, its value) at the deepest iteration all workers finished."""
+        depth = min(len(iterations) for iterations in results) - 1
+        self.depth_reached = depth
+
+        if depth == 0:
+            # nobody finished an iteration: keep the heuristic's first choice
+            return results[0][0][1], None
+
+        best_edge = None
+        best_value = None
+        for iterations in results:
+            _, edge, value = iterations[depth]
+            if best_value is None or value > best_value:
+                best_edge, best_value = edge, value
+
+        return best_edge, best_value
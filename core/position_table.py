@@ -0,0 +1,99 @@
+import mmap
+import struct
+
+# =====================================================
+# On-disk table of positions, shared by the opening book and the
+# endgame tablebase
+#
+#   header  magic (4 bytes), version, number_of_dots, one byte for the
+#           table's own use, 1 unused byte, slot count (u32), entry count (u32)
+#   slots   slot count x (key u64, edge u16, value i16), little-endian
+#
+# Keys are symmetry-canonical Zobrist keys and edges are in the canonical
+# frame, as in TranspositionTable. The slot count is a power of two and
+# entries sit at key & (slots - 1) with linear probing, so a lookup reads
+# one or two slots straight from the mapped file and nothing is parsed
+# at load time. Empty slots have edge EMPTY. Edge ids must stay below
+# NO_EDGE, which allows boards of up to 181 dots a side.
+# =====================================================
+HEADER = struct.Struct("<4sBBBxII")
+SLOT = struct.Struct("<QHh")
+VERSION = 2
+EMPTY = 0xFFFF
+NO_EDGE = 0xFFFE
+MAX_DOTS = 181
+
+
+def check_board_size(number_of_dots):
+    """Raises ValueError unless the format can hold this board size."""
+    if not 2 <= number_of_dots <= MAX_DOTS:
+        raise ValueError(f"position tables hold boards of 2 to {MAX_DOTS} dots a side, "
+                         f"not {number_of_dots}")
+
+
+def write_position_table(path, magic, number_of_dots, entries, extra=0):
+    """Writes {canonical key: (canonical edge or None, value)} to path."""
+    check_board_size(number_of_dots)
+
+    slots = 1
+    while slots < 2 * len(entries):
+        slots *= 2
+
+    table = [None] * slots
+    for key, (edge, value) in entries.items():
+        index = key & (slots - 1)
+        while table[index] is not None:
+            index = (index + 1) & (slots - 1)
+        table[index] = (key, NO_EDGE if edge is None else edge, value)
+
+    buffer = bytearray(HEADER.size + slots * SLOT.size)
+    HEADER.pack_into(buffer, 0, magic, VERSION, number_of_dots, extra, slots, len(entries))
+    for index, slot in enumerate(table):
+        if slot is None:
+            slot = (0, EMPTY, 0)
+        SLOT.pack_into(buffer, HEADER.size + index * SLOT.size, *slot)
+
+    with open(path, "wb") as f:
+        f.write(buffer)
+
+
+class PositionTable:
+    """Read-only, memory-mapped view of a file from write_position_table."""
+
+    def __init__(self, path, magic):
+        self.path = path
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        file_magic, version, self.number_of_dots, self.extra, self.slots, self.entries = \
+            HEADER.unpack_from(self.data, 0)
+        if file_magic != magic or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a {magic.decode()} v{VERSION} file; rebuild it")
+
+        self.probes = 0
+        self.hits = 0
+
+    def __len__(self):
+        return self.entries
+
+    def probe(self, key):
+        """Returns (canonical edge or None, value) for key, or None."""
+        self.probes += 1
+        mask = self.slots - 1
+        index = key & mask
+        data = self.data
+
+        while True:
+            slot_key, edge, value = SLOT.unpack_from(data, HEADER.size + index * SLOT.size)
+            if edge == EMPTY:
+                return None
+            if slot_key == key:
+                self.hits += 1
+                return (None if edge == NO_EDGE else edge), value
+            index = (index + 1) & mask
+
+    def close(self):
+        if self.data is not None:
+            self.data.close()
+            self.data = None
@@ -0,0 +1,99 @@
+import json
+import time
+from collections import deque
+from functools import wraps
+
+
+def timed(phase):
+    """Adds a method's running time to ``self.timings[phase]``.
+
+    ``self.timings`` is None unless a move is being profiled, in which case
+    the only cost is one extra call and an attribute check.
+    """
+    def decorate(method):
+        @wraps(method)
+        def wrapper(self, *args):
+            timings = self.timings
+            if timings is None:
+                return method(self, *args)
+
+            start = time.perf_counter()
+            try:
+                return method(self, *args)
+            finally:
+                timings[phase] = timings.get(phase, 0.0) + time.perf_counter() - start
+        return wrapper
+    return decorate
+
+
+class MoveProfiler:
+    """Ring buffer of per-move measurements.
+
+    A record is opened with begin(), filled in by whoever handles the move
+    (AIEngine while thinking, GameEngine while drawing) and closed with end().
+    Only the last ``capacity`` records are kept. Times are in milliseconds.
+    """
+
+    def __init__(self, capacity=256):
+        self.records = deque(maxlen=capacity)
+        self.current = None
+        self.moves_recorded = 0
+
+    def begin(self, **fields):
+        """Opens a record for the next move, dropping one that was never closed."""
+        self.current = {"move_number": self.moves_recorded, "timings_ms": {}}
+        self.current.update(fields)
+        return self.current
+
+    def add_time(self, phase, seconds):
+        if self.current is None:
+            return
+        timings = self.current["timings_ms"]
+        timings[phase] = timings.get(phase, 0.0) + seconds * 1000
+
+    def end(self):
+        if self.current is None:
+            return None
+
+        record = self.current
+        self.current = None
+        self.records.append(record)
+        self.moves_recorded += 1
+        return record
+
+    def last(self):
+        return self.records[-1] if self.records else None
+
+    def clear(self):
+        self.records.clear()
+        self.current = None
+
+    def to_json(self):
+        return json.dumps(list(self.records), indent=2)
+
+    def dump_json(self, path):
+        with open(path, "w") as f:
+            f.write(self.to_json() + "\n")
+
+    @staticmethod
+    def summary(record):
+        """A few short lines describing one record, for the debug overlay."""
+        lines = [f"move {record['move_number']}: {record.get('source', '?')}"
+                 + (f" ({record['difficulty']})" if record.get("difficulty") else "")]
+
+        timings = record["timings_ms"]
+        lines.extend(f"{phase:<10}{ms:9.1f} ms" for phase, ms in timings.items())
+
+        if record.get("precomputed"):
+            lines.append("book/tablebase move")
+        if record.get("nodes") is not None:
+            lines.append(f"nodes {record['nodes']}  depth {record['depth']}")
+            if record.get("nodes_per_sec"):
+                lines.append(f"{record['nodes_per_sec']:.0f} nodes/s")
+        if record.get("tt_probes"):
+            lines.append(f"tt {record['tt_hits']}/{record['tt_probes']} "
+                         f"({100 * record['tt_hit_rate']:.0f}%)")
+        if record.get("playouts") is not None:
+            lines.append(f"playouts {record['playouts']}")
+
+        return lines
@@ -0,0 +1,281 @@
+import time
+from core.endgame import solve, solve_edges
+from core.hint_engine import HintEngine
+from core.profiler import timed
+from core.tablebase import tablebase_for
+from core.transposition import EXACT, LOWER, UPPER, TranspositionTable
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class SearchEngine:
+    """Negamax with alpha-beta pruning and iterative deepening.
+
+    Values are the net number of boxes the player to move can still win
+    from the position. A move that completes a box keeps the turn, so its
+    value is added rather than negated and it does not use up depth.
+    Loony endgames are valued exactly by core.endgame instead of searched,
+    as are positions covered by an installed endgame tablebase.
+    Because values depend only on the drawn edges, results are kept in a
+    transposition table under the symmetry-canonical key of the position.
+    """
+
+    def __init__(self, state, time_budget=0.2, max_depth=None, table=None, cancel_event=None):
+        self.state = state
+        self.time_budget = time_budget
+        self.max_depth = max_depth
+        self.table = table if table is not None else TranspositionTable()
+        self.cancel_event = cancel_event
+        self.tablebase = tablebase_for(state.number_of_dots)
+
+        self.nodes = 0
+        self.depth_reached = 0
+        self._deadline = None
+
+        # phase -> seconds while a move is being profiled, otherwise None
+        self.timings = None
+
+    # =====================================================
+    # PUBLIC: returns ("row"/"col", (r,c)) of best move
+    # =====================================================
+    def get_best_move(self):
+        edge = self.best_edge()
+        if edge is None:
+            return None
+        return self.state.geometry.edge_move(edge)
+
+    def best_edge(self):
+        root_edges = self.state.legal_edges()
+        if not root_edges:
+            return None
+
+        self.nodes = 0
+        self.depth_reached = 0
+        if len(root_edges) == 1:
+            return root_edges[0]
+
+        solved = solve(self.state)
+        if solved is not None:
+            return solved[1]
+
+        depth, edge, value = self.search_root(root_edges)[-1]
+        return edge
+
+    def search_root(self, root_edges):
+        """Deepens iteratively over the given root edges until time runs out.
+
+        Returns one (depth, best edge, value) entry per finished iteration,
+        after a (0, edge, None) entry holding the heuristic's first choice.
+        """
+        board = self.state.snapshot()
+
+        self._deadline = time.perf_counter() + self.time_budget
+        self._zobrist = board.zobrist
+        hints = HintEngine(board)
+
+        ordered = self._order_by_heuristic(hints, board, root_edges)
+        results = [(0, ordered[0], None)]
+
+        # a root split only sees some of the moves, so its best is no
+        # value for the position itself
+        whole_position = len(root_edges) == len(board.legal_edges())
+
+        max_depth = len(board.legal_edges())
+        if self.max_depth is not None:
+            max_depth = min(max_depth, self.max_depth)
+
+        for depth in range(1, max_depth + 1):
+            try:
+                edge, value, scores = self._search_root(board, hints, ordered, depth)
+            except SearchTimeout:
+                break
+
+            results.append((depth, edge, value))
+            self.depth_reached = depth
+            ordered.sort(key=lambda e: scores[e], reverse=True)
+            if whole_position:
+                self._store(board, depth, value, EXACT, edge)
+
+        return results
+
+    def analyse_root(self, root_edges):
+        """Like search_root, but every root edge gets its own full-window
+        value, so all of them are exact to the depth searched.
+
+        Returns one (depth, {edge: value}) entry per finished iteration.
+        """
+        board = self.state.snapshot()
+
+        self._deadline = time.perf_counter() + self.time_budget
+        self._zobrist = board.zobrist
+        hints = HintEngine(board)
+
+        ordered = self._order_by_heuristic(hints, board, root_edges)
+        results = []
+
+        max_depth = len(root_edges)
+        if self.max_depth is not None:
+            max_depth = min(max_depth, self.max_depth)
+
+        for depth in range(1, max_depth + 1):
+            values = {}
+            try:
+                for edge in ordered:
+                    values[edge] = self._child_value(board, hints, edge, depth,
+                                                     -float("inf"), float("inf"))
+            except SearchTimeout:
+                break
+
+            results.append((depth, values))
+            self.depth_reached = depth
+            ordered.sort(key=values.__getitem__, reverse=True)
+            self._store(board, depth, values[ordered[0]], EXACT, ordered[0])
+
+        return results
+
+    def _search_root(self, board, hints, edges, depth):
+        alpha = -float("inf")
+        beta = float("inf")
+        best_edge = edges[0]
+        scores = {}
+
+        for edge in edges:
+            value = self._child_value(board, hints, edge, depth, alpha, beta)
+            scores[edge] = value
+
+            if value > alpha:
+                alpha = value
+                best_edge = edge
+
+        return best_edge, alpha, scores
+
+    def _child_value(self, board, hints, edge, depth, alpha, beta):
+        captured = len(board.apply_edge(edge))
+        try:
+            if captured:
+                return captured + self._negamax(board, hints, depth,
+                                                alpha - captured, beta - captured)
+            return -self._negamax(board, hints, depth - 1, -beta, -alpha)
+        finally:
+            board.undo_move()
+
+    def _negamax(self, board, hints, depth, alpha, beta):
+        self.nodes += 1
+        if self.nodes & 63 == 0 and (time.perf_counter() > self._deadline or self._cancelled()):
+            raise SearchTimeout()
+
+        edges = self._legal_edges(board)
+        if not edges:
+            return 0
+
+        if self.tablebase is not None and len(edges) <= self.tablebase.max_free:
+            value = self.tablebase.value(board.position_key()[0])
+            if value is not None:
+                return value
+
+        solved = self._solve(board)
+        if solved is not None:
+            return solved[0]
+
+        if depth <= 0:
+            return self._static_eval(board)
+
+        key, sym = board.position_key()
+        entry = self.table.probe(key)
+        tt_edge = None
+        if entry is not None:
+            entry_depth, value, flag, canonical_edge = entry
+            if entry_depth >= depth:
+                if flag == EXACT:
+                    return value
+                if flag == LOWER and value >= beta:
+                    return value
+                if flag == UPPER and value <= alpha:
+                    return value
+            if canonical_edge is not None:
+                tt_edge = self._zobrist.from_canonical(canonical_edge, sym)
+
+        if depth >= 2:
+            edges = self._order_by_heuristic(hints, board, edges)
+        else:
+            edges = self._order_by_captures(board, edges)
+
+        if tt_edge is not None and tt_edge in edges:
+            edges.remove(tt_edge)
+            edges.insert(0, tt_edge)
+
+        original_alpha = alpha
+        best = -float("inf")
+        best_edge = None
+        for edge in edges:
+            value = self._child_value(board, hints, edge, depth, alpha, beta)
+
+            if value > best:
+                best = value
+                best_edge = edge
+                if best > alpha:
+                    alpha = best
+                    if alpha >= beta:
+                        break
+
+        if best <= original_alpha:
+            flag = UPPER
+        elif best >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table.store(key, depth, best, flag, self._zobrist.to_canonical(best_edge, sym))
+
+        return best
+
+    def _cancelled(self):
+        return self.cancel_event is not None and self.cancel_event.is_set()
+
+    @timed("movegen")
+    def _legal_edges(self, board):
+        return board.legal_edges()
+
+    @timed("endgame")
+    def _solve(self, board):
+        return solve_edges(board.edges, board.geometry)
+
+    def _store(self, board, depth, value, flag, edge):
+        key, sym = board.position_key()
+        self.table.store(key, depth, value, flag, self._zobrist.to_canonical(edge, sym))
+
+    # =====================================================
+    # Leaf evaluation: boxes the mover can take right now
+    # =====================================================
+    @timed("evaluation")
+    def _static_eval(self, board):
+        # a 3-sided box can never be one that is already claimed
+        return board.three_sided.bit_count()
+
+    # =====================================================
+    # Move ordering
+    # =====================================================
+    @timed("evaluation")
+    def _order_by_heuristic(self, hints, board, edges):
+        legal, scores = hints.evaluate_all()
+        score_of = dict(zip(legal.tolist(), scores.tolist()))
+        return sorted(edges, key=score_of.__getitem__, reverse=True)
+
+    @timed("ordering")
+    def _order_by_captures(self, board, edges):
+        """Cheap ordering near the leaves: captures, then safe edges, then the rest."""
+        capturable = board.capturable
+        unsafe = board.unsafe
+        captures, safe, rest = [], [], []
+
+        for edge in edges:
+            bit = 1 << edge
+            if capturable & bit:
+                captures.append(edge)
+            elif unsafe & bit:
+                rest.append(edge)
+            else:
+                safe.append(edge)
+
+        return captures + safe + rest
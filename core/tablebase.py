@@ -0,0 +1,150 @@
+"""Endgame tablebase: perfect play once few enough edges are left.
+
+Build one offline with
+
+    python -m core.tablebase --size 6 --max-free 5
+
+which values every symmetry-canonical position with at most ``max_free``
+undrawn edges, fewest first, each from the positions one edge further on,
+and writes assets/tablebase_<size>.bin. AIEngine, HintEngine and
+SearchEngine pick the file up automatically when it exists.
+"""
+import argparse
+import os
+import time
+from functools import lru_cache
+from core.bitboard import geometry_for, iter_bits
+from core.position_table import PositionTable, check_board_size, write_position_table
+from core.transposition import zobrist_for
+
+TABLEBASE_MAGIC = b"DBTB"
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets")
+
+
+def tablebase_path(number_of_dots):
+    return os.path.join(ASSETS_DIR, f"tablebase_{number_of_dots}.bin")
+
+
+@lru_cache(maxsize=None)
+def tablebase_for(number_of_dots):
+    """The tablebase for this board size, mapped once per process, or None."""
+    path = tablebase_path(number_of_dots)
+    if not os.path.exists(path):
+        return None
+    return Tablebase(path)
+
+
+class Tablebase(PositionTable):
+    """Exact value and best edge of every position with at most ``max_free``
+    undrawn edges. Values are net boxes for the player to move, as in
+    SearchEngine; they depend only on the drawn edges."""
+
+    def __init__(self, path):
+        super().__init__(path, TABLEBASE_MAGIC)
+        self.max_free = self.extra
+
+    def covers(self, edges, geometry):
+        return (geometry.all_edges & ~edges).bit_count() <= self.max_free
+
+    def lookup(self, state):
+        """(value, edge in the state's own frame) or None if not covered."""
+        if not state.legal_edges() or not self.covers(state.edges, state.geometry):
+            return None
+
+        key, sym = state.position_key()
+        entry = self.probe(key)
+        if entry is None:
+            return None
+
+        edge, value = entry
+        return value, state.zobrist.from_canonical(edge, sym)
+
+    def value(self, key):
+        """Value of a covered position by canonical key, or None."""
+        entry = self.probe(key)
+        return None if entry is None else entry[1]
+
+    def best_move(self, state):
+        found = self.lookup(state)
+        if found is None:
+            return None
+        return state.geometry.edge_move(found[1])
+
+
+# =====================================================
+# Generation: layer k holds the positions with k undrawn edges.
+# Every position in layer k is one of layer k-1 with a drawn edge
+# removed, and is valued from its children back in layer k-1.
+# =====================================================
+def build_tablebase(number_of_dots, max_free, progress=None):
+    """Returns {canonical key: (canonical edge, value)} for every position
+    with 1..max_free undrawn edges."""
+    geometry = geometry_for(number_of_dots)
+    zobrist = zobrist_for(number_of_dots)
+    box_masks = geometry.box_masks
+    edge_boxes = geometry.edge_boxes
+
+    full = geometry.all_edges
+    # canonical key -> (edges, hashes) of one representative
+    previous = {zobrist.canonical(zobrist.hashes(full))[0]: (full, zobrist.hashes(full))}
+    previous_values = {key: 0 for key in previous}
+    entries = {}
+
+    for free in range(1, max_free + 1):
+        layer = {}
+        for edges, hashes in previous.values():
+            for edge in iter_bits(edges):
+                child_hashes = zobrist.update(hashes, edge)
+                key, sym = zobrist.canonical(child_hashes)
+                if key not in layer:
+                    layer[key] = (edges & ~(1 << edge), child_hashes, sym)
+
+        values = {}
+        for key, (edges, hashes, sym) in layer.items():
+            best = None
+            best_edge = None
+            for edge in iter_bits(full & ~edges):
+                child = edges | (1 << edge)
+                captured = sum(1 for b in edge_boxes[edge]
+                               if child & box_masks[b] == box_masks[b])
+                child_key = zobrist.canonical(zobrist.update(hashes, edge))[0]
+                rest = previous_values[child_key]
+                value = captured + rest if captured else -rest
+
+                if best is None or value > best:
+                    best, best_edge = value, edge
+
+            values[key] = best
+            entries[key] = (zobrist.to_canonical(best_edge, sym), best)
+
+        previous = {key: (edges, hashes) for key, (edges, hashes, _) in layer.items()}
+        previous_values = values
+        if progress is not None:
+            progress(free, len(layer))
+
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build an endgame tablebase.")
+    parser.add_argument("--size", type=int, default=6, help="dots per side")
+    parser.add_argument("--max-free", type=int, default=5,
+                        help="cover positions with at most this many undrawn edges")
+    parser.add_argument("--output", help="defaults to assets/tablebase_<size>.bin")
+    args = parser.parse_args()
+    try:
+        check_board_size(args.size)
+    except ValueError as e:
+        parser.error(str(e))
+
+    start = time.perf_counter()
+    entries = build_tablebase(args.size, args.max_free,
+                              lambda free, count: print(f"{free} free: {count} positions"))
+    path = args.output or tablebase_path(args.size)
+    write_position_table(path, TABLEBASE_MAGIC, args.size, entries, extra=args.max_free)
+
+    print(f"{len(entries)} positions in {time.perf_counter() - start:.0f}s -> {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import random
+from functools import lru_cache
+from core.bitboard import geometry_for, iter_bits
+
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+ZOBRIST_SEED = 0x5EED_D075
+
+
+# =====================================================
+# The eight symmetries of the square board
+#
+# Each one maps dot (x, y) to another dot; an edge maps to the edge between
+# the images of its two dots. Row edge (r, c) joins dots (r, c)-(r+1, c),
+# col edge (r, c) joins (r, c)-(r, c+1).
+# =====================================================
+def _dot_transforms(m):
+    return [
+        lambda x, y: (x, y),
+        lambda x, y: (y, m - x),
+        lambda x, y: (m - x, m - y),
+        lambda x, y: (m - y, x),
+        lambda x, y: (m - x, y),
+        lambda x, y: (x, m - y),
+        lambda x, y: (y, x),
+        lambda x, y: (m - y, m - x),
+    ]
+
+
+@lru_cache(maxsize=None)
+def edge_symmetries(number_of_dots):
+    """Edge permutations for the eight board symmetries, identity first."""
+    geometry = geometry_for(number_of_dots)
+    perms = []
+
+    for transform in _dot_transforms(number_of_dots - 1):
+        perm = []
+        for edge in range(geometry.num_edges):
+            t, (r, c) = geometry.edge_move(edge)
+            a = (r, c)
+            b = (r + 1, c) if t == "row" else (r, c + 1)
+
+            (ax, ay), (bx, by) = transform(*a), transform(*b)
+            if ay == by:
+                perm.append(geometry.edge_index("row", (min(ax, bx), ay)))
+            else:
+                perm.append(geometry.edge_index("col", (ax, min(ay, by))))
+        perms.append(perm)
+
+    return perms
+
+
+class Zobrist:
+    """Zobrist keys for edge sets, tracked under all eight symmetries at once.
+
+    ``hashes`` is a tuple holding the key of the position as seen through each
+    symmetry; the smallest of them is the canonical key, shared by every
+    rotation and reflection of the position.
+    """
+
+    def __init__(self, number_of_dots, seed=ZOBRIST_SEED):
+        geometry = geometry_for(number_of_dots)
+        rng = random.Random(seed)
+        base = [rng.getrandbits(64) for _ in range(geometry.num_edges)]
+
+        self.perms = edge_symmetries(number_of_dots)
+        self.inverse_perms = []
+        for perm in self.perms:
+            inverse = [0] * len(perm)
+            for edge, image in enumerate(perm):
+                inverse[image] = edge
+            self.inverse_perms.append(inverse)
+
+        self.edge_keys = [tuple(base[perm[edge]] for perm in self.perms)
+                          for edge in range(geometry.num_edges)]
+
+    def hashes(self, edges):
+        hashes = [0] * len(self.perms)
+        for edge in iter_bits(edges):
+            for k, key in enumerate(self.edge_keys[edge]):
+                hashes[k] ^= key
+        return tuple(hashes)
+
+    def update(self, hashes, edge):
+        keys = self.edge_keys[edge]
+        return tuple([h ^ keys[k] for k, h in enumerate(hashes)])
+
+    def canonical(self, hashes):
+        """Returns (canonical key, index of the symmetry that produced it)."""
+        sym = min(range(len(hashes)), key=hashes.__getitem__)
+        return hashes[sym], sym
+
+    def to_canonical(self, edge, sym):
+        return self.perms[sym][edge]
+
+    def from_canonical(self, edge, sym):
+        return self.inverse_perms[sym][edge]
+
+
+@lru_cache(maxsize=None)
+def zobrist_for(number_of_dots):
+    return Zobrist(number_of_dots)
+
+
+class TranspositionTable:
+    """Fixed-size table of search results with depth-preferred replacement.
+
+    Entries are keyed by canonical Zobrist key and store the best edge in the
+    canonical frame, so a hit can come from any symmetric transposition.
+    """
+
+    def __init__(self, size=1 << 16):
+        self.size = size
+        self.slots = [None] * size
+
+        self.probes = 0
+        self.hits = 0
+
+    def clear(self):
+        self.slots = [None] * self.size
+        self.probes = 0
+        self.hits = 0
+
+    def probe(self, key):
+        """Returns (depth, value, flag, best_edge) for key, or None."""
+        self.probes += 1
+        entry = self.slots[key % self.size]
+        if entry is None or entry[0] != key:
+            return None
+
+        self.hits += 1
+        return entry[1:]
+
+    def store(self, key, depth, value, flag, best_edge):
+        index = key % self.size
+        entry = self.slots[index]
+
+        if entry is None or entry[0] == key or depth >= entry[1]:
+            self.slots[index] = (key, depth, value, flag, best_edge)
+
+    def hit_rate(self):
+        return self.hits / self.probes if self.probes else 0.0
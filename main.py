@@ -1,4 +1,5 @@
 # main.py
+from multiprocessing import freeze_support
 from tkinter import Tk
 from ui.main_menu import MainMenu
 from ui.mode_select import ModeSelect
@@ -70,4 +71,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # the hard AI can search in worker processes; needed for frozen builds
+    freeze_support()
     main()
@@ -0,0 +1,92 @@
+import random
+from functools import lru_cache
+from core.bitboard import iter_bits
+
+
+def minimax(geometry):
+    """Exhaustive negamax over every remaining edge order.
+
+    Returns value(edges): net boxes for the player to move, with the same
+    conventions as SearchEngine. Only usable with a handful of free edges.
+    """
+    box_masks = geometry.box_masks
+    edge_boxes = geometry.edge_boxes
+
+    @lru_cache(maxsize=None)
+    def value(edges):
+        best = None
+        for edge in iter_bits(geometry.all_edges & ~edges):
+            child = edges | (1 << edge)
+            captured = sum(1 for b in edge_boxes[edge] if child & box_masks[b] == box_masks[b])
+            result = captured + value(child) if captured else -value(child)
+            if best is None or result > best:
+                best = result
+        return 0 if best is None else best
+
+    return value
+
+
+def move_value(value, geometry, edges, edge):
+    """Value of drawing ``edge`` from ``edges``, under the value function."""
+    child = edges | (1 << edge)
+    captured = sum(1 for b in geometry.edge_boxes[edge]
+                   if child & geometry.box_masks[b] == geometry.box_masks[b])
+    return captured + value(child) if captured else -value(child)
+
+
+def random_positions(geometry, count, max_free, seed=0, accept=None):
+    """``count`` random edge sets with at most ``max_free`` undrawn edges,
+    drawn edge by edge and kept when accept(edges) holds."""
+    rng = random.Random(seed)
+    positions = []
+
+    while len(positions) < count:
+        order = list(range(geometry.num_edges))
+        rng.shuffle(order)
+        edges = 0
+        for edge in order:
+            edges |= 1 << edge
+            free = (geometry.all_edges & ~edges).bit_count()
+            if free == 0:
+                break
+            if free <= max_free and (accept is None or accept(edges)) and rng.random() < 0.3:
+                positions.append(edges)
+                break
+
+    return positions
+
+
+def loop_positions(geometry, count, max_free, seed=0, accept=None, opened=False):
+    """Like random_positions, but every position starts from a full board
+    with the middle of a random 2x2 block of boxes undrawn, i.e. a loop of
+    4 boxes, before more edges are taken away. With ``opened`` one edge of
+    the loop stays drawn, so the player to move can take it."""
+    rng = random.Random(seed)
+    side = geometry.number_of_dots - 1
+    positions = []
+
+    while len(positions) < count:
+        r, c = rng.randrange(side - 1), rng.randrange(side - 1)
+        top_left, bottom_right = r * side + c, (r + 1) * side + c + 1
+        top, bottom, left, right = 0, 1, 2, 3
+        inner = (geometry.box_edges[top_left][bottom], geometry.box_edges[top_left][right],
+                 geometry.box_edges[bottom_right][top], geometry.box_edges[bottom_right][left])
+
+        edges = geometry.all_edges
+        for edge in inner[1:] if opened else inner:
+            edges &= ~(1 << edge)
+
+        target = rng.randint(4, max_free)
+        order = [e for e in range(geometry.num_edges) if (edges >> e) & 1 and e not in inner]
+        rng.shuffle(order)
+        for edge in order:
+            if (geometry.all_edges & ~edges).bit_count() >= target:
+                break
+            candidate = edges & ~(1 << edge)
+            if accept is None or accept(candidate):
+                edges = candidate
+
+        if accept is None or accept(edges):
+            positions.append(edges)
+
+    return positions
@@ -0,0 +1,90 @@
+import unittest
+from functools import partial
+from core.bitboard import geometry_for
+from core.endgame import control_value, solve_edges
+from tests.brute_force import loop_positions, minimax, move_value, random_positions
+
+
+def _solvable(geometry):
+    return lambda edges: solve_edges(edges, geometry) is not None
+
+
+class SolveEdgesTest(unittest.TestCase):
+    """solve_edges against exhaustive minimax on small loony endgames."""
+
+    def check_board(self, number_of_dots, count, max_free, generate=random_positions):
+        geometry = geometry_for(number_of_dots)
+        value = minimax(geometry)
+
+        for edges in generate(geometry, count, max_free, seed=number_of_dots,
+                              accept=_solvable(geometry)):
+            solved_value, edge = solve_edges(edges, geometry)
+            expected = value(edges)
+
+            self.assertEqual(solved_value, expected, f"value of {edges:#x}")
+            self.assertFalse((edges >> edge) & 1, f"drawn edge chosen in {edges:#x}")
+            self.assertEqual(move_value(value, geometry, edges, edge), expected,
+                             f"move {edge} in {edges:#x}")
+
+    def test_3x3(self):
+        self.check_board(4, 300, 14)
+
+    def test_4x4(self):
+        self.check_board(5, 150, 14)
+
+    def test_loops(self):
+        self.check_board(4, 100, 14, loop_positions)
+        self.check_board(5, 100, 14, loop_positions)
+
+    def test_opened_loops(self):
+        opened = partial(loop_positions, opened=True)
+        self.check_board(4, 100, 14, opened)
+        self.check_board(5, 100, 14, opened)
+
+    def test_declined_opened_loop(self):
+        # 4x4 boxes: an opened loop through boxes 0, 1, 5, 4 and a 5-chain
+        # through boxes 2, 3, 7, 11, 15, every other box complete. Taking
+        # the loop means opening the chain (4 - 5), so the mover should take
+        # none of the loop and hand all 4 boxes over, keeping control (-4 + 5).
+        geometry = geometry_for(5)
+
+        def shared(a, b):
+            edge, = set(geometry.box_edges[a]) & set(geometry.box_edges[b])
+            return edge
+
+        def border(box):
+            return next(e for e in geometry.box_edges[box] if len(geometry.edge_boxes[e]) == 1)
+
+        chain = [2, 3, 7, 11, 15]
+        # the loop's edge between boxes 0 and 1 is drawn, opening it
+        free = {shared(1, 5), shared(5, 4), shared(4, 0), border(chain[0]), border(chain[-1])}
+        free.update(shared(a, b) for a, b in zip(chain, chain[1:]))
+
+        edges = geometry.all_edges
+        for edge in free:
+            edges &= ~(1 << edge)
+
+        value = minimax(geometry)
+        self.assertEqual(value(edges), 1)
+        solved_value, edge = solve_edges(edges, geometry)
+        self.assertEqual(solved_value, 1)
+        self.assertEqual(move_value(value, geometry, edges, edge), 1)
+
+    def test_positions_with_safe_moves_are_left_alone(self):
+        geometry = geometry_for(4)
+        self.assertIsNone(solve_edges(0, geometry))
+
+
+class ControlValueTest(unittest.TestCase):
+
+    def test_known_values(self):
+        self.assertEqual(control_value((), ())[0], 0)
+        # a lone chain or loop: whoever opens it gives every box away
+        self.assertEqual(control_value((3,), ())[0], -3)
+        self.assertEqual(control_value((), (4,))[0], -4)
+        # two 3-chains: the opponent takes 1, hands back 2, and gets the other 3
+        self.assertEqual(control_value((3, 3), ())[0], -2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import random
+import unittest
+from types import SimpleNamespace
+from core.game_engine import GameEngine
+
+
+class _Canvas:
+    """Just enough of a Tk canvas for GameEngine, without a display."""
+
+    def __init__(self):
+        self.items = {}
+
+    def _create(self, *args, **kwargs):
+        item = len(self.items) + 1
+        self.items[item] = kwargs.get("tags")
+        return item
+
+    create_line = create_oval = create_rectangle = create_text = _create
+
+    def delete(self, item):
+        if isinstance(item, int):
+            self.items.pop(item, None)
+        else:
+            for key in [key for key, tags in self.items.items() if tags == item]:
+                del self.items[key]
+
+    def tag_raise(self, *args):
+        pass
+
+    def tag_lower(self, *args):
+        pass
+
+
+def _snapshot(engine):
+    state = engine.state
+    return (state.edges, state.p1_boxes, state.p2_boxes, state.player1_turn,
+            state.score(), tuple(state.hashes))
+
+
+class UndoRedoTest(unittest.TestCase):
+
+    def play_random_game(self, engine, rng):
+        """Plays to the end; returns the position before every move and at the end."""
+        positions = [_snapshot(engine)]
+        while not engine.is_gameover():
+            edge = rng.choice(engine.state.legal_edges())
+            engine.apply_ai_move(engine.state.geometry.edge_move(edge))
+            positions.append(_snapshot(engine))
+        return positions
+
+    def test_undo_to_start_and_redo_to_end(self):
+        rng = random.Random(1)
+        for number_of_dots in (3, 4, 6):
+            engine = GameEngine(_Canvas(), number_of_dots=number_of_dots)
+            positions = self.play_random_game(engine, rng)
+            # every box was captured along the way
+            self.assertEqual(sum(positions[-1][4]), engine.state.geometry.num_boxes)
+
+            for expected in reversed(positions[:-1]):
+                self.assertTrue(engine.undo_move())
+                self.assertEqual(_snapshot(engine), expected)
+            self.assertFalse(engine.undo_move())
+            self.assertEqual(engine.edge_items, {})
+            self.assertEqual(engine.box_items, {})
+
+            for expected in positions[1:]:
+                self.assertTrue(engine.redo_move())
+                self.assertEqual(_snapshot(engine), expected)
+            self.assertFalse(engine.redo_move())
+            self.assertEqual(len(engine.box_items), engine.state.geometry.num_boxes)
+
+    def test_new_move_clears_redo(self):
+        engine = GameEngine(_Canvas(), number_of_dots=4)
+        geometry = engine.state.geometry
+
+        engine.apply_ai_move(geometry.edge_move(0))
+        engine.apply_ai_move(geometry.edge_move(1))
+        engine.undo_move()
+        self.assertEqual(len(engine.redo_stack), 1)
+        engine.apply_ai_move(geometry.edge_move(2))
+        self.assertEqual(engine.redo_stack, [])
+
+        # and likewise for a human click on a free edge
+        engine.undo_move()
+        self.assertEqual(len(engine.redo_stack), 1)
+        sx, sy, ex, ey = engine.edge_coords(*geometry.edge_move(3))
+        engine.click(SimpleNamespace(x=(sx + ex) / 2, y=(sy + ey) / 2))
+        self.assertTrue((engine.state.edges >> 3) & 1)
+        self.assertEqual(engine.redo_stack, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
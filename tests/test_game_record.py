@@ -0,0 +1,78 @@
+import os
+import random
+import tempfile
+import unittest
+from core.game_record import (MAGIC, GameRecord, GameRecordReader, GameRecordWriter,
+                              load_games, save_games)
+from core.game_state import GameState
+
+
+def _random_game(number_of_dots, rng, player1="p1", player2="p2"):
+    state = GameState(number_of_dots)
+    while state.legal_edges():
+        state.apply_edge(rng.choice(state.legal_edges()))
+    return GameRecord.from_state(state, player1, player2)
+
+
+class GameRecordTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(3)
+        # 10 dots has edge ids past 127, which take the multi-byte varint path
+        self.records = [_random_game(n, rng, f"policy {n}", "médium")
+                        for n in (3, 6, 6, 8, 10, 10)]
+        self.records.append(GameRecord(6, [5, 17, 40], "", "abandoned"))
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def test_encode_decode(self):
+        for record in self.records:
+            data = bytes(record.encode())
+            decoded, offset = GameRecord.decode(data)
+            self.assertEqual(decoded, record)
+            self.assertEqual(offset, len(data))
+
+        self.assertGreater(max(self.records[-2].moves), 127)
+
+    def test_writer_and_reader(self):
+        path = self.path("games.dbgr")
+        with GameRecordWriter(path, buffer_size=64) as out:
+            out.write(self.records[0])
+            out.write_encoded(bytes(self.records[1].encode()))
+            for record in self.records[2:]:
+                out.write(record)
+            self.assertEqual(out.games_written, len(self.records))
+
+        with GameRecordReader(path) as reader:
+            self.assertEqual(list(reader), self.records)
+            self.assertEqual(len(reader), len(self.records))
+            self.assertEqual(reader.offsets()[0], len(MAGIC))
+            for index in reversed(range(len(self.records))):
+                self.assertEqual(reader[index], self.records[index])
+
+        self.assertEqual(save_games(self.path("again.dbgr"), self.records), len(self.records))
+        self.assertEqual(load_games(self.path("again.dbgr")), self.records)
+
+    def test_replay_matches_header(self):
+        for record in self.records[:-1]:
+            state = record.replay()
+            self.assertTrue(state.is_gameover())
+            self.assertEqual(state.score(), (record.p1_score, record.p2_score))
+            self.assertEqual(GameRecord.from_state(state, record.player1, record.player2), record)
+
+    def test_rejects_other_files(self):
+        for name, content in (("empty.dbgr", b""), ("short.dbgr", b"DB"),
+                              ("other.dbgr", b"not a record file")):
+            path = self.path(name)
+            with open(path, "wb") as f:
+                f.write(content)
+            with self.assertRaisesRegex(ValueError, "not a game record file"):
+                GameRecordReader(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import random
+import unittest
+from core.game_state import GameState
+
+
+def _rebuilt(state):
+    """A fresh state restored from the same position, for comparison."""
+    other = GameState(state.number_of_dots)
+    other.restore(state.edges, state.p1_boxes, state.p2_boxes, state.player1_turn)
+    return other
+
+
+class IncrementalStateTest(unittest.TestCase):
+    """The per-move upkeep of apply_edge/undo_move against a full rebuild."""
+
+    def assert_consistent(self, state, context):
+        expected = _rebuilt(state)
+        for name in ("sides", "three_sided", "capturable", "unsafe", "hashes"):
+            self.assertEqual(getattr(state, name), getattr(expected, name),
+                             f"{name} after {context}")
+        self.assertEqual(state.safe_edges, expected.safe_edges, f"safe_edges after {context}")
+
+    def test_random_games_with_undo(self):
+        rng = random.Random(0)
+        for number_of_dots in range(3, 8):
+            state = GameState(number_of_dots)
+            for game in range(20):
+                state.reset()
+                self.assert_consistent(state, "reset")
+
+                while state.legal_edges():
+                    edge = rng.choice(state.legal_edges())
+                    state.apply_edge(edge)
+                    self.assert_consistent(state, f"apply {edge}")
+
+                    if rng.random() < 0.3:
+                        state.undo_move()
+                        self.assert_consistent(state, "undo")
+
+                while state.move_history:
+                    state.undo_move()
+                    self.assert_consistent(state, "undo")
+                self.assertEqual(state.edges, 0)
+
+    def test_copy_and_snapshot_are_independent(self):
+        state = GameState(4)
+        for edge in (0, 4, 12, 1):
+            state.apply_edge(edge)
+
+        for other in (state.copy(), state.snapshot()):
+            other.apply_edge(other.legal_edges()[0])
+            self.assert_consistent(other, "apply on a copy")
+            self.assert_consistent(state, "apply on a copy")
+            self.assertNotEqual(other.edges, state.edges)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import random
+import unittest
+import numpy as np
+from core.game_state import GameState
+from core.hint_engine import HintEngine
+
+
+class EvaluateAllTest(unittest.TestCase):
+    """The batched evaluate_all against the per-move _evaluate."""
+
+    def test_matches_evaluate(self):
+        rng = random.Random(2)
+        checked_owned = 0
+
+        for number_of_dots in (3, 4, 6):
+            state = GameState(number_of_dots)
+            hints = HintEngine(state)
+
+            for game in range(15):
+                state.reset()
+                while state.legal_edges():
+                    edges, scores = hints.evaluate_all()
+                    moves = state.legal_moves()
+                    expected = [hints._evaluate(move) for move in moves]
+
+                    self.assertEqual(edges.tolist(), state.legal_edges())
+                    self.assertEqual(scores.tolist(), expected)
+                    # ties go to the first legal move, as max() over moves would
+                    self.assertEqual(moves[int(np.argmax(scores))], max(moves, key=hints._evaluate))
+
+                    if state.captured:
+                        checked_owned += 1
+                    state.apply_edge(rng.choice(state.legal_edges()))
+
+        self.assertGreater(checked_owned, 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
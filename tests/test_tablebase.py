@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+from core.bitboard import geometry_for
+from core.game_state import GameState
+from core.position_table import write_position_table
+from core.tablebase import TABLEBASE_MAGIC, Tablebase, build_tablebase
+from core.transposition import zobrist_for
+from tests.brute_force import minimax, move_value, random_positions
+
+
+class BuildTablebaseTest(unittest.TestCase):
+    """build_tablebase against exhaustive minimax on small boards."""
+
+    def check_board(self, number_of_dots, max_free, count):
+        geometry = geometry_for(number_of_dots)
+        zobrist = zobrist_for(number_of_dots)
+        value = minimax(geometry)
+        entries = build_tablebase(number_of_dots, max_free)
+
+        for edges in random_positions(geometry, count, max_free, seed=number_of_dots):
+            key, sym = zobrist.canonical(zobrist.hashes(edges))
+            self.assertIn(key, entries, f"{edges:#x} not covered")
+
+            canonical_edge, stored = entries[key]
+            edge = zobrist.from_canonical(canonical_edge, sym)
+            expected = value(edges)
+
+            self.assertEqual(stored, expected, f"value of {edges:#x}")
+            self.assertFalse((edges >> edge) & 1, f"drawn edge stored for {edges:#x}")
+            self.assertEqual(move_value(value, geometry, edges, edge), expected,
+                             f"move {edge} in {edges:#x}")
+
+    def test_2x2(self):
+        self.check_board(3, 8, 300)
+
+    def test_3x3(self):
+        self.check_board(4, 7, 300)
+
+
+class TablebaseFileTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        entries = build_tablebase(4, 4)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "tablebase_4.bin")
+            write_position_table(path, TABLEBASE_MAGIC, 4, entries, extra=4)
+
+            tablebase = Tablebase(path)
+            try:
+                self.assertEqual(len(tablebase), len(entries))
+                self.assertEqual(tablebase.max_free, 4)
+                for key, entry in entries.items():
+                    self.assertEqual(tablebase.probe(key), entry)
+
+                state = GameState(4)
+                self.assertIsNone(tablebase.lookup(state))
+                for edge in range(state.geometry.num_edges - 3):
+                    state.apply_edge(edge)
+                value, edge = tablebase.lookup(state)
+                self.assertEqual(value, minimax(state.geometry)(state.edges))
+                self.assertFalse((state.edges >> edge) & 1)
+            finally:
+                tablebase.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+# tournament.py
+"""Headless self-play between AI policies.
+
+    python tournament.py medium hard --games 200 --size 6 --seed 1 --workers 8
+
+Players alternate who moves first. Reports win rate, average margin and
+per-move latency percentiles for each policy. With --record FILE every game
+is also saved in the core.game_record format. Nothing here imports Tk.
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from core.ai_engine import AIEngine
+from core.game_record import GameRecord, GameRecordWriter
+from core.game_state import GameState
+
+POLICIES = ("easy", "medium", "hard", "mcts")
+
+
+def play_game(policy_a, policy_b, number_of_dots, seed, a_first, time_budget, record=False):
+    """Plays one game.
+
+    Returns (boxes for a, boxes for b, latencies of a, latencies of b, the
+    encoded GameRecord or None).
+    """
+    state = GameState(number_of_dots)
+    players = {
+        "a": (policy_a, AIEngine(state, time_budget=time_budget, seed=seed)),
+        "b": (policy_b, AIEngine(state, time_budget=time_budget, seed=seed + 1)),
+    }
+    first, second = ("a", "b") if a_first else ("b", "a")
+    latencies = {"a": [], "b": []}
+
+    while not state.is_gameover():
+        side = first if state.player1_turn else second
+        policy, ai = players[side]
+
+        start = time.perf_counter()
+        move = ai.get_ai_move(policy)
+        latencies[side].append(time.perf_counter() - start)
+
+        state.apply_move(move)
+
+    p1, p2 = state.score()
+    boxes_a, boxes_b = (p1, p2) if a_first else (p2, p1)
+
+    encoded = None
+    if record:
+        names = (policy_a, policy_b) if a_first else (policy_b, policy_a)
+        encoded = bytes(GameRecord.from_state(state, *names).encode())
+
+    return boxes_a, boxes_b, latencies["a"], latencies["b"], encoded
+
+
+def _play_game_args(args):
+    return play_game(*args)
+
+
+def run_tournament(policy_a, policy_b, games, number_of_dots=6, seed=0,
+                   workers=1, time_budget=0.2, record_path=None):
+    record = record_path is not None
+    jobs = [(policy_a, policy_b, number_of_dots, seed + 2 * i, i % 2 == 0, time_budget, record)
+            for i in range(games)]
+
+    start = time.perf_counter()
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_play_game_args, jobs, chunksize=max(1, games // (4 * workers))))
+    else:
+        results = [play_game(*job) for job in jobs]
+    elapsed = time.perf_counter() - start
+
+    if record:
+        with GameRecordWriter(record_path) as out:
+            for result in results:
+                out.write_encoded(result[4])
+
+    return summarise(policy_a, policy_b, results, elapsed)
+
+
+def summarise(policy_a, policy_b, results, elapsed):
+    games = len(results)
+    margins = np.array([result[0] - result[1] for result in results])
+
+    def side(name, sign, latencies):
+        wins = int(np.count_nonzero(sign * margins > 0))
+        ms = np.array(latencies) * 1000 if latencies else np.zeros(1)
+        return {
+            "policy": name,
+            "wins": wins,
+            "win_rate": wins / games,
+            "avg_margin": float(sign * margins.mean()),
+            "moves": len(latencies),
+            "latency_ms": {
+                "p50": float(np.percentile(ms, 50)),
+                "p90": float(np.percentile(ms, 90)),
+                "p99": float(np.percentile(ms, 99)),
+                "max": float(ms.max()),
+            },
+        }
+
+    return {
+        "games": games,
+        "draws": int(np.count_nonzero(margins == 0)),
+        "seconds": elapsed,
+        "games_per_minute": 60 * games / elapsed if elapsed else 0.0,
+        "players": [
+            side(policy_a, 1, [t for result in results for t in result[2]]),
+            side(policy_b, -1, [t for result in results for t in result[3]]),
+        ],
+    }
+
+
+def print_report(report):
+    print(f"{report['games']} games, {report['draws']} draws, "
+          f"{report['seconds']:.1f}s ({report['games_per_minute']:.0f} games/min)")
+    print(f"{'policy':<10}{'wins':>6}{'win%':>8}{'margin':>9}"
+          f"{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for p in report["players"]:
+        lat = p["latency_ms"]
+        print(f"{p['policy']:<10}{p['wins']:>6}{100 * p['win_rate']:>7.1f}%{p['avg_margin']:>9.2f}"
+              f"{lat['p50']:>10.2f}{lat['p90']:>10.2f}{lat['p99']:>10.2f}{lat['max']:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play AI policies against each other without a UI.")
+    parser.add_argument("policy_a", choices=POLICIES)
+    parser.add_argument("policy_b", choices=POLICIES)
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--size", type=int, default=6, help="dots per side")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--time-budget", type=float, default=0.2,
+                        help="seconds per move for hard and mcts")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--record", metavar="FILE", help="save every game to FILE")
+    args = parser.parse_args()
+
+    report = run_tournament(args.policy_a, args.policy_b, args.games, args.size,
+                            args.seed, args.workers, args.time_budget, args.record)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
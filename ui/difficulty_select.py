@@ -41,6 +41,14 @@ class DifficultySelect(Frame):
             command=lambda: manager.show_screen("GameScreen", mode="AI", difficulty="hard")
         ).pack(pady=10)
 
+        Button(
+            self,
+            text="MCTS",
+            font=("Comic Sans MS", 22),
+            width=15,
+            command=lambda: manager.show_screen("GameScreen", mode="AI", difficulty="mcts")
+        ).pack(pady=10)
+
         Button(
             self,
             text="BACK",
@@ -1,6 +1,9 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import Frame, Canvas, Label, Button
+from core.profiler import MoveProfiler
 from utils.constants import BG_COLOR, BORDER_COLOR
-import numpy as np
 
 class GameScreen(Frame):
     def __init__(self, parent, manager):
@@ -44,24 +47,55 @@ class GameScreen(Frame):
         Button(self.right, text="HINT", font=("Comic Sans MS", 18), width=12,
                command=self.show_hint).pack(pady=10)
 
+        Button(self.right, text="HEATMAP", font=("Comic Sans MS", 18), width=12,
+               command=self.show_heatmap).pack(pady=10)
+
         self.undo_button = Button(self.right, text="UNDO", font=("Comic Sans MS", 18), width=12,
                command=self.undo_move)
         self.undo_button.pack(pady=10)
 
+        self.redo_button = Button(self.right, text="REDO", font=("Comic Sans MS", 18), width=12,
+               command=self.redo_move)
+        self.redo_button.pack(pady=10)
+
         Button(self.right, text="BACK", font=("Comic Sans MS", 18), width=12,
                command=lambda: manager.show_screen("ModeSelect")).pack(pady=40)
 
         self.mode = None
         self.difficulty = None
 
+        # AI moves are computed on a worker thread and picked up with after()
+        self.ai_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ai")
+        self.ai_future = None
+        self.ai_generation = 0
+        self.ai_after_id = None
+        # heatmap analysis runs on the same thread: (future, position hash)
+        self.heatmap_job = None
+
+        # F3 toggles per-move profiling and its overlay, F4 dumps it to JSON
+        self.profiler = None
+        self.winfo_toplevel().bind("<F3>", self.toggle_profiling, add="+")
+        self.winfo_toplevel().bind("<F4>", self.dump_profile, add="+")
+
+        # closing the window: don't leave hard AI workers behind
+        self.bind("<Destroy>", self.shutdown_ai)
+
     def _placeholder_click(self, event):
         return "no-engine"
 
-    def load(self, mode=None, difficulty=None, **kwargs):
+    def load(self, mode=None, difficulty=None, number_of_dots=6, **kwargs):
+        self.cancel_ai_turn()
+
+        if self.engine is not None and self.engine.number_of_dots != number_of_dots:
+            self.shutdown_ai()
+            self.engine = None
+
         if self.engine is None:
             try:
                 from core.game_engine import GameEngine
-                self.engine = GameEngine(self.canvas)
+                self.engine = GameEngine(self.canvas, number_of_dots=number_of_dots,
+                                         ai_workers=os.cpu_count() or 1,
+                                         profiler=self.profiler)
             except Exception as e:
                 print("[GameScreen] Error creating GameEngine:", e)
                 self.engine = None
@@ -84,22 +118,31 @@ class GameScreen(Frame):
         if mode == "PVP" or mode is None:
             self.title.config(text="Player vs Player")
             self.undo_button.config(state="normal")
+            self.redo_button.config(state="normal")
         else:
             self.title.config(text=f"AI Mode: {difficulty.upper() if difficulty else 'EASY'}")
             self.undo_button.config(state="disabled")
+            self.redo_button.config(state="disabled")
 
         self.update_turn_label()
         self.update_score_display()
+        self.update_debug_overlay()
 
     def unload(self):
+        self.cancel_ai_turn()
+        self.shutdown_ai()
         self.place_forget()
 
+    def shutdown_ai(self, event=None):
+        """Stops the hard AI's worker processes; the next hard move restarts them."""
+        if self.engine:
+            self.engine.ai.shutdown()
+
     def update_score_display(self):
         if not self.engine:
             return
 
-        p1 = int(np.count_nonzero(self.engine.box_owner == 1))
-        p2 = int(np.count_nonzero(self.engine.box_owner == 2))
+        p1, p2 = self.engine.state.score()
 
         self.p1_score_label.config(text=f"P1: {p1}")
         self.p2_score_label.config(text=f"P2: {p2}")
@@ -112,7 +155,7 @@ class GameScreen(Frame):
                 pass
 
     def show_hint(self):
-        if not self.engine:
+        if not self.engine or self.ai_thinking():
             return
 
         move = self.engine.get_hint()
@@ -122,8 +165,39 @@ class GameScreen(Frame):
         edge_type, pos = move
         self.engine.highlight_edge(edge_type, pos)
     
+    def show_heatmap(self):
+        if not self.engine or self.ai_thinking() or self.heatmap_job is not None:
+            return
+
+        # the analysis takes a few hundred ms, so keep it off the Tk thread
+        state = self.engine.state.snapshot()
+        future = self.ai_executor.submit(self.engine.analyzer.analyse, state)
+        self.heatmap_job = (future, state.hashes[0])
+        self.after(20, self.poll_heatmap, self.ai_generation)
+
+    def poll_heatmap(self, generation):
+        if self.heatmap_job is None:
+            return
+
+        future, position = self.heatmap_job
+        if not future.done():
+            self.after(20, self.poll_heatmap, generation)
+            return
+        self.heatmap_job = None
+
+        try:
+            analysis = future.result()
+        except Exception as e:
+            print("[GameScreen] heatmap error:", e)
+            return
+
+        # drop it if a move was played or the game changed meanwhile
+        if generation != self.ai_generation or self.engine.state.hashes[0] != position:
+            return
+        self.engine.show_heatmap(analysis)
+
     def undo_move(self):
-        if not self.engine:
+        if not self.engine or self.ai_thinking():
             return
         
         result = self.engine.undo_move()
@@ -131,33 +205,128 @@ class GameScreen(Frame):
             self.update_score_display()
             self.update_turn_label()
 
+    def redo_move(self):
+        if not self.engine or self.ai_thinking():
+            return
+
+        if not self.engine.redo_move():
+            return
+
+        self.update_score_display()
+        self.update_debug_overlay()
+
+        if self.engine.is_gameover():
+            p1, p2 = self.engine.state.score()
+
+            winner = "Winner: Player 1" if p1 > p2 else (
+                    "Winner: Player 2" if p2 > p1 else "It's a tie")
+
+            self.manager.show_screen("ResultScreen",
+                                 result_text=winner,
+                                 p1_score=p1,
+                                 p2_score=p2)
+
+    def toggle_profiling(self, event=None):
+        self.profiler = None if self.profiler is not None else MoveProfiler()
+        if self.engine:
+            self.engine.set_profiler(self.profiler)
+        self.update_debug_overlay()
+
+    def dump_profile(self, event=None):
+        if self.profiler is None:
+            return
+
+        path = time.strftime("profile-%Y%m%d-%H%M%S.json")
+        self.profiler.dump_json(path)
+        print(f"[GameScreen] wrote {len(self.profiler.records)} move records to {path}")
+
+    def update_debug_overlay(self):
+        self.canvas.delete("debug")
+        if self.profiler is None:
+            return
+
+        record = self.profiler.last()
+        lines = MoveProfiler.summary(record) if record else ["profiling: no moves yet"]
+
+        self.canvas.create_text(8, 8, anchor="nw", text="\n".join(lines),
+                                fill="black", font=("Courier", 10), tags="debug")
+
+    def ai_thinking(self):
+        return self.ai_future is not None
+
+    def schedule_ai_turn(self, delay):
+        if self.ai_after_id is not None:
+            self.after_cancel(self.ai_after_id)
+        self.ai_after_id = self.after(delay, self.run_ai_turn)
+
+    def cancel_ai_turn(self):
+        """Drop any pending or running AI move (BACK, new game)."""
+        self.ai_generation += 1
+
+        if self.ai_after_id is not None:
+            self.after_cancel(self.ai_after_id)
+            self.ai_after_id = None
+
+        if self.ai_future is not None:
+            if self.engine:
+                self.engine.ai.cancel()
+            self.ai_future = None
+
     def run_ai_turn(self):
-        if not self.engine:
+        self.ai_after_id = None
+        if not self.engine or self.ai_thinking():
             return
 
-        while self.mode == "AI" and not self.engine.player1_turn:
-            gameover = self.engine.ai_move(self.difficulty)
+        if self.mode != "AI" or self.engine.player1_turn:
+            return
 
-            self.update_score_display()
-            self.update_turn_label()
-            if gameover:
-                p1 = int(np.count_nonzero(self.engine.box_owner == 1))
-                p2 = int(np.count_nonzero(self.engine.box_owner == 2))
+        self.engine.ai.clear_cancel()
+        self.ai_future = self.ai_executor.submit(self.engine.ai.get_ai_move, self.difficulty)
+        self.after(20, self.poll_ai_turn, self.ai_generation)
 
-                winner = "Winner: Player 1" if p1 > p2 else (
-                        "Winner: Player 2" if p2 > p1 else "It's a tie")
+    def poll_ai_turn(self, generation):
+        if generation != self.ai_generation or self.ai_future is None:
+            return
 
-                self.manager.show_screen("ResultScreen",
-                                     result_text=winner,
-                                     p1_score=p1,
-                                     p2_score=p2)
-                return
+        if not self.ai_future.done():
+            self.after(20, self.poll_ai_turn, generation)
+            return
 
-            if self.engine.player1_turn:
-                break
+        future = self.ai_future
+        self.ai_future = None
+
+        try:
+            move = future.result()
+        except Exception as e:
+            print("[GameScreen] AI move error:", e)
+            return
+
+        gameover = self.engine.apply_ai_move(move)
+
+        self.update_score_display()
+        self.update_turn_label()
+        self.update_debug_overlay()
+        if gameover:
+            p1, p2 = self.engine.state.score()
+
+            winner = "Winner: Player 1" if p1 > p2 else (
+                    "Winner: Player 2" if p2 > p1 else "It's a tie")
+
+            self.manager.show_screen("ResultScreen",
+                                 result_text=winner,
+                                 p1_score=p1,
+                                 p2_score=p2)
+            return
+
+        # a completed box gives the AI another move
+        if move is not None and not self.engine.player1_turn:
+            self.schedule_ai_turn(0)
 
     def on_click(self, event):
-        if not self.engine:
+        if not self.engine or self.ai_thinking():
+            return
+
+        if self.mode == "AI" and not self.engine.player1_turn:
             return
 
         try:
@@ -167,9 +336,10 @@ class GameScreen(Frame):
             result = None
 
         self.update_score_display()
+        self.update_debug_overlay()
 
-        if self.mode == "AI" and not self.engine.player1_turn:
-            self.after(300, self.run_ai_turn)
+        if self.mode == "AI" and not self.engine.player1_turn and not isinstance(result, dict):
+            self.schedule_ai_turn(300)
 
         if isinstance(result, dict):
             winner = result.get("result_text", "")